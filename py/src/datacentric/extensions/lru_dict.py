@@ -0,0 +1,36 @@
+from collections import OrderedDict
+
+
+class LruDict(OrderedDict):
+    """Dictionary that holds at most capacity items. When an item is added
+    to a full dictionary, the least recently used item is evicted.
+
+    Items are marked as used when they are set or read using [] or get(...).
+    """
+    __slots__ = ('capacity',)
+
+    def __init__(self, capacity: int):
+        super().__init__()
+
+        self.capacity = capacity
+        """Maximum number of items in the dictionary."""
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        # The item may be evicted by another thread before it is moved
+        try:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+        except KeyError:
+            return default
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
@@ -1,14 +1,18 @@
 import re
+import sys
+from functools import lru_cache
 
 
+@lru_cache(maxsize=None)
 def to_pascal_case(name: str) -> str:
-    return ''.join(x for x in name.title() if not x == '_')
+    # Interned since the same element names are used as keys of every serialized document
+    return sys.intern(''.join(part[:1].upper() + part[1:] for part in name.split('_')))
 
 
-__first_cap_re = re.compile('(.)([A-Z][a-z]+)')
-__all_cap_re = re.compile('([a-z0-9])([A-Z])')
+_first_cap_sub = re.compile('(.)([A-Z][a-z]+)').sub
+_all_cap_sub = re.compile('([a-z0-9])([A-Z])').sub
 
 
+@lru_cache(maxsize=None)
 def to_snake_case(name: str) -> str:
-    s1 = __first_cap_re.sub(r'\1_\2', name)
-    return __all_cap_re.sub(r'\1_\2', s1).lower()
+    return _all_cap_sub(r'\1_\2', _first_cap_sub(r'\1_\2', name)).lower()
@@ -1,14 +1,19 @@
-from bson.objectid import ObjectId
+from __future__ import annotations
+from typing import TYPE_CHECKING
 
-from datacentric.platform.logging.log import Log
+if TYPE_CHECKING:
+    from bson.objectid import ObjectId
+    from datacentric.platform.logging.log import Log
+    from datacentric.platform.storage import DataSource
 
 
 class Context:
     """Context defines dataset and provides access to data,
     logging, and other supporting functionality.
     """
+    __slots__ = ('data_source', 'data_set', 'log')
 
-    data_source: 'DataSource'
+    data_source: DataSource
     data_set: ObjectId
     log: Log
 
@@ -1,19 +1,30 @@
 from abc import ABC, abstractmethod
 from typing import Optional
 
+from datacentric.platform.logging.log_entry import LogEntry
 from datacentric.platform.logging.log_entry_type import LogEntryType
 
 
 class Log(ABC):
-    verbosity: LogEntryType
-    """Log verbosity is the highest log entry type displayed.
-    Verbosity can be modified at runtime to provide different levels of
-    verbosity for different code segments.
-    """
 
     def __init__(self):
         self.verbosity = LogEntryType.Empty
 
+    @property
+    def verbosity(self) -> LogEntryType:
+        """Log verbosity is the highest log entry type displayed.
+        Verbosity can be modified at runtime to provide different levels of
+        verbosity for different code segments.
+        """
+        return self.__verbosity
+
+    @verbosity.setter
+    def verbosity(self, value: LogEntryType) -> None:
+        self.__verbosity = value
+        # Empty verbosity does not filter entries, the threshold lets
+        # append methods decide with a single comparison
+        self._verbosity_threshold = max(LogEntryType) if value is LogEntryType.Empty else value
+
     @abstractmethod
     def append(self, entry_type: LogEntryType, entry_sub_type: Optional[str], message: str,
                *message_params: object) -> None:
@@ -36,7 +47,7 @@ class Log(ABC):
         """Record an error message and return exception with the same message.
         The caller is expected to raise the exception: raise Log.exception(message, messageParams)."""
         self.append(LogEntryType.Error, None, message, *message_params)
-        e = Exception(message.format(message_params))
+        e = Exception(LogEntry.format_message(message, *message_params))
         return e
 
     def error(self, message: str, *message_params: object) -> None:
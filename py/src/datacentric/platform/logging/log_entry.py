@@ -1,9 +1,21 @@
 from datacentric.platform.logging.log_entry_type import LogEntryType
 
+_max_message_param_length = 255
+"""Message parameters longer than this are truncated in the middle."""
+
+_substring_length = (_max_message_param_length - 5) // 2
+"""Length of head and tail kept from a truncated message parameter."""
+
+
+def _truncate(arg_str: str) -> str:
+    """Restrict message parameter length if more than max length."""
+    if len(arg_str) > _max_message_param_length:
+        return arg_str[:_substring_length] + ' ... ' + arg_str[-_substring_length:]
+    return arg_str
+
 
 class LogEntry:
     """Log entry consists of formatted message and the original message parameter objects."""
-    __max_message_param_length = 255
 
     def __init__(self, entry_type: LogEntryType, entry_sub_type: str, message: str, *message_params: object):
         formatted_message = LogEntry.format_message(message, *message_params)
@@ -20,19 +32,8 @@ class LogEntry:
     @staticmethod
     def format_message(message: str, *message_params: object) -> str:
         if len(message_params) > 0:
-            formatted_message_params = []
-            for arg in message_params:
-                arg_str = str(arg)
-
-                # Restrict message length if more than max length
-                if len(arg_str) > LogEntry.__max_message_param_length:
-                    substring_length: int = (LogEntry.__max_message_param_length - 5) // 2
-                    head = arg_str[0:substring_length]
-                    tail = arg_str[len(arg_str) - substring_length:len(arg_str)]
-                    arg_str = head + ' ... ' + tail
-                formatted_message_params.append(arg_str)
-
-            result = message.format(formatted_message_params)
+            formatted_message_params = [_truncate(str(arg)) for arg in message_params]
+            result = message.format(*formatted_message_params)
 
             # If the message ends with four dots (....) because the last argument is truncated
             # while its token is followed by a dot (.), reduce to three dots at the end (...)
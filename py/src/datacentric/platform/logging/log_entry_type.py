@@ -1,20 +1,20 @@
-from enum import Enum
+from enum import IntEnum
 
 
-class LogEntryType(Enum):
-    Empty = 0,
+class LogEntryType(IntEnum):
+    Empty = 0
     """Empty"""
 
-    Error = 1,
+    Error = 1
     """Error message (recorded when exception is thrown)"""
 
-    Warning = 2,
+    Warning = 2
     """Warning message."""
 
-    Status = 3,
+    Status = 3
     """Status message."""
 
-    Progress = 4,
+    Progress = 4
     """Progress ratio or message."""
 
     Verify = 5
@@ -1,45 +1,43 @@
-from typing import Dict, List
-import typing_inspect
+from functools import lru_cache
+from typing import Dict, ForwardRef, Tuple
 
 
 class ClassInfo:
     """Contains reflection based helper static methods.
     """
-    __is_initialized: bool = False
     __data_types_map: Dict[str, type] = dict()
 
     @staticmethod
     def get_type(name: str) -> type:
         """Returns data derived type given its name."""
-        if not ClassInfo.__is_initialized:
-            from datacentric.types.record import TypedRecord, TypedKey, Data
-            children = ClassInfo.__get_runtime_imported_data(Data, [])
-            for child in children:
-                if child not in ClassInfo.__data_types_map:
-                    ClassInfo.__data_types_map[child.__name__] = child
-            ClassInfo.__is_initialized = True
-
-        if name not in ClassInfo.__data_types_map:
-            raise KeyError
-
         return ClassInfo.__data_types_map[name]
 
     @staticmethod
+    def register_type(type_: type) -> None:
+        """Registers data derived type so that it can be found by name.
+        Called for every class derived from Data when the class is created.
+        """
+        ClassInfo.__data_types_map[type_.__name__] = type_
+
+    @staticmethod
+    @lru_cache(maxsize=None)
     def get_key_from_record(type_: type) -> type:
         """Extracts associated key from RootRecord and TypedRecord derived types."""
-        if not typing_inspect.is_generic_type(type_):
+        # Generic bases are read directly from the class, inherited
+        # from the base class for types derived from a generic record or key
+        generic_bases = getattr(type_, '__orig_bases__', None)
+        if not generic_bases:
             raise Exception(f'Cannot get associated key from not generic type {type_.__name__}')
 
         from datacentric.types.record import TypedKey, TypedRecord, RootRecord
-        from typing import ForwardRef
 
-        generic_base = typing_inspect.get_generic_bases(type_)[0]
+        generic_base = generic_bases[0]
 
-        generic_origin = typing_inspect.get_origin(generic_base)
+        generic_origin = getattr(generic_base, '__origin__', None)
         if generic_origin is not RootRecord and generic_origin is not TypedRecord:
             raise Exception(f'Wrong generic origin: {generic_origin.__name__}. Expected TypedRecord || RootRecord')
 
-        generic_arg = typing_inspect.get_args(generic_base)[0]  # Arg
+        generic_arg = generic_base.__args__[0]  # Arg
 
         # Generic parameter is forward ref
         if type(generic_arg) is ForwardRef:
@@ -51,21 +49,24 @@ class ClassInfo:
             raise Exception(f'Cannot deduce key from type {type_.__name__}')
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_record_from_key(type_: type) -> type:
         """Extracts associated record from TypedKey derived types."""
-        if not typing_inspect.is_generic_type(type_):
+        # Generic bases are read directly from the class, inherited
+        # from the base class for types derived from a generic record or key
+        generic_bases = getattr(type_, '__orig_bases__', None)
+        if not generic_bases:
             raise Exception(f'Cannot get associated key from not generic type {type_.__name__}')
 
         from datacentric.types.record import TypedKey, TypedRecord, RootRecord
-        from typing import ForwardRef
 
-        generic_base = typing_inspect.get_generic_bases(type_)[0]
+        generic_base = generic_bases[0]
 
-        generic_origin = typing_inspect.get_origin(generic_base)
+        generic_origin = getattr(generic_base, '__origin__', None)
         if generic_origin is not TypedKey:
             raise Exception(f'Wrong generic origin: {generic_origin.__name__}. Expected TypedKey')
 
-        generic_arg = typing_inspect.get_args(generic_base)[0]  # Arg
+        generic_arg = generic_base.__args__[0]  # Arg
 
         # Generic parameter is forward ref
         if type(generic_arg) is ForwardRef:
@@ -77,27 +78,46 @@ class ClassInfo:
             raise Exception(f'Cannot deduce key from type {type_.__name__}')
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_root_type(type_: type) -> type:
         """Returns type of the class at the root of the inheritance chain, one
         before Data, TypedKey[TRecord], TypedRecord[TKey] or RootRecord[TKey].
         """
         from datacentric.types.record import TypedKey, TypedRecord, RootRecord, Data
-        root_types = [TypedKey, TypedRecord, RootRecord, Data]
+        root_types = (TypedKey, TypedRecord, RootRecord, Data)
 
-        if type_.mro()[0] in root_types:
+        type_mro = type_.__mro__
+        if type_mro[0] in root_types:
             raise Exception(f'Cannot get root type from root type.')
-        type_mro = type_.mro()
+
+        # Root types are checked in the order above, so types derived from RootRecord,
+        # which is derived from TypedRecord, resolve to RootRecord and share its collection
         for root_type in root_types:
             if root_type in type_mro:
-                index = type_mro.index(root_type)
-                return type_mro[index - 1]
+                return type_mro[type_mro.index(root_type) - 1]
         raise Exception(f'Type is not derived from Data.')
 
     @staticmethod
-    def __get_runtime_imported_data(type_: type, children: List[type]) -> List[type]:
-        """For the given type recursively adds its children."""
-        current_children = type_.__subclasses__()
-        for t in current_children:
-            ClassInfo.__get_runtime_imported_data(t, children)
-        children.extend(current_children)
-        return children
+    @lru_cache(maxsize=None)
+    def get_slots(type_: type) -> Tuple[str, ...]:
+        """Returns slots of the class and its bases up to, but not including,
+        Record for record types or Data for other data types, in MRO order.
+        """
+        from datacentric.types.record import Record, Data
+
+        type_mro = type_.__mro__
+        if Record in type_mro:
+            chain = type_mro[:type_mro.index(Record)]
+        elif Data in type_mro:
+            chain = type_mro[:type_mro.index(Data)]
+        else:
+            raise Exception(f'Cannot get slots of class {type_.__name__} not derived from Record or Data.')
+
+        slots = []
+        for class_ in chain:
+            class_slots = class_.__dict__.get('__slots__', ())
+            if type(class_slots) is str:
+                slots.append(class_slots)
+            else:
+                slots.extend(class_slots)
+        return tuple(slots)
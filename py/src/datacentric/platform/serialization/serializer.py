@@ -1,11 +1,9 @@
 import datetime as dt
 import numpy as np
-import inspect
-import itertools
 from bson import ObjectId
 from enum import Enum
-from typing import Dict, Any, get_type_hints, TypeVar
-from typing_inspect import get_origin, get_args
+from types import MemberDescriptorType
+from typing import Dict, Any, Callable, Tuple, get_type_hints, TypeVar
 
 import datacentric.types.time.date_ext as date_ext
 import datacentric.extensions.str as str_ext
@@ -20,7 +18,6 @@ TRecord = TypeVar('TRecord', bound=Record)
 
 def serialize(obj: TRecord):
     dict_ = _serialize_class(obj)
-    dict_['_t'] = obj.__class__.__name__
     dict_['_dataset'] = obj.data_set
     dict_['_key'] = obj.key
     dict_['_id'] = obj.id_
@@ -28,171 +25,369 @@ def serialize(obj: TRecord):
     return dict_
 
 
+_class_serializers: Dict[type, Callable[[Any], Dict[str, Any]]] = dict()
+"""Generated serializer for each class, cached per class."""
+
+_value_serializers: Dict[type, Callable[[Any], Any]] = dict()
+"""Serializer for slot values, cached per runtime type of the value."""
+
+
 def _serialize_class(obj: TRecord):
-    dict_ = dict()
-    dict_['_t'] = obj.__class__.__name__
-    mro = inspect.getmro(type(obj))
-    from datacentric.types.record import Record, Data
-
-    if Record in mro:
-        idx = mro.index(Record)
-        chain = mro[:idx]
-    elif Data in mro:
-        idx = mro.index(Data)
-        chain = mro[:idx]
+    obj_type = type(obj)
+    class_serializer = _class_serializers.get(obj_type)
+    if class_serializer is None:
+        class_serializer = _compile_class_serializer(obj_type)
+    return class_serializer(obj)
+
+
+def _compile_class_serializer(type_: type) -> Callable[[Any], Dict[str, Any]]:
+    """Generate, compile and cache serializer function for the class.
+
+    The generated function reads each slot directly and skips None values.
+    Slots with names that start with an underscore hold private state of the
+    object, such as caches, and are not serialized.
+    Values of slots declared with a type that is stored as is are assigned
+    directly when their runtime type matches, the serializer for other
+    values is looked up by their runtime type, for example:
+
+    def _serialize_BaseSample(obj):
+        dict_ = {'_t': 'BaseSample'}
+        value = obj.record_id
+        if value is not None:
+            if type(value) is member_type_0:
+                dict_['RecordId'] = value
+            else:
+                value_type = type(value)
+                serializer = get_value_serializer(value_type)
+                if serializer is None:
+                    serializer = resolve_value_serializer(value_type)
+                dict_['RecordId'] = serializer(value)
+        ...
+        return dict_
+    """
+    function_name = f'_serialize_{type_.__name__}'
+    namespace = {'get_value_serializer': _value_serializers.get,
+                 'resolve_value_serializer': _get_value_serializer}
+
+    type_hints = get_type_hints(type_)
+    lines = [f'def {function_name}(obj):',
+             f'    dict_ = {{\'_t\': {type_.__name__!r}}}']
+    for index, slot in enumerate(ClassInfo.get_slots(type_)):
+        if slot.startswith('_'):
+            continue
+        element_name = str_ext.to_pascal_case(slot)
+        lines += [f'    value = obj.{slot}',
+                  f'    if value is not None:']
+
+        indent = '        '
+        member_type = type_hints.get(slot)
+        if _primitive_serializers.get(member_type) is _as_is:
+            namespace[f'member_type_{index}'] = member_type
+            lines += [f'        if type(value) is member_type_{index}:',
+                      f'            dict_[{element_name!r}] = value',
+                      f'        else:']
+            indent = '            '
+
+        lines += [f'{indent}value_type = type(value)',
+                  f'{indent}serializer = get_value_serializer(value_type)',
+                  f'{indent}if serializer is None:',
+                  f'{indent}    serializer = resolve_value_serializer(value_type)',
+                  f'{indent}dict_[{element_name!r}] = serializer(value)']
+    lines.append('    return dict_')
+
+    exec('\n'.join(lines), namespace)
+
+    class_serializer = namespace[function_name]
+    _class_serializers[type_] = class_serializer
+    return class_serializer
+
+
+def _get_value_serializer(value_type: type) -> Callable[[Any], Any]:
+    """Resolve and cache serializer for the runtime type of a slot value.
+
+    Key, Data and Enum are matched including derived types,
+    other types are matched exactly.
+    """
+    if issubclass(value_type, Key):
+        serializer = _serialize_key
+    elif issubclass(value_type, Data):
+        serializer = _serialize_class
+    elif issubclass(value_type, Enum):
+        serializer = _serialize_enum
+    elif value_type is list:
+        serializer = _serialize_list
     else:
-        raise Exception(f'Cannot serialize class {obj.__class__.__name__} not derived from Record or Data.')
+        serializer = _get_primitive_serializer(value_type)
 
-    slot_lists = [x.__slots__ for x in chain]
-    slots = list(itertools.chain.from_iterable(slot_lists))
+    _value_serializers[value_type] = serializer
+    return serializer
 
-    for slot in slots:
-        value = obj.__getattribute__(slot)
-        if value is None:
-            continue
 
-        value_type = type(value)
-        if issubclass(value_type, Key):
-            serialized_value = value.value
-        elif issubclass(value_type, Data):
-            serialized_value = _serialize_class(value)
-        elif issubclass(value_type, Enum):
-            serialized_value = value.name
-        elif value_type is list:
-            serialized_value = _serialize_list(value)
-        else:
-            serialized_value = _serialize_primitive(value)
+def _get_primitive_serializer(value_type: type) -> Callable[[Any], Any]:
+    serializer = _primitive_serializers.get(value_type)
+    if serializer is None:
+        raise Exception(f'Cannot serialize type {value_type.__name__}')
+    return serializer
 
-        dict_[str_ext.to_pascal_case(slot)] = serialized_value
-    return dict_
+
+def _serialize_key(value: Key):
+    return value.value
+
+
+def _serialize_enum(value: Enum):
+    return value.name
+
+
+def _as_is(value):
+    return value
+
+
+_primitive_serializers: Dict[type, Callable[[Any], Any]] = {
+    str: _as_is,
+    int: _as_is,
+    float: _as_is,
+    bool: _as_is,
+    ObjectId: _as_is,
+    dt.datetime: _as_is,
+    dt.date: date_ext.date_to_iso_int,
+    dt.time: date_ext.time_to_iso_int,
+    LocalMinute: date_ext.minute_to_iso_int,
+    # TODO: check for pymongo.binary.Binary to speed-up
+    np.ndarray: np.ndarray.tolist
+}
+"""Serializers for primitive types, matched by exact type."""
 
 
 def _serialize_list(list_):
+    if not list_:
+        return []
+
+    # Lists are expected to be homogeneous, so the serializer is resolved
+    # for the first item and resolved again only for items of other types
+    head_type = type(list_[0])
+    head_serializer = _get_list_item_serializer(head_type)
+
     result = []
+    append = result.append
     for value in list_:
         value_type = type(value)
-        if issubclass(value_type, Key):
-            result.append(value.value)
-        elif issubclass(value_type, Data):
-            result.append(_serialize_class(value))
-        elif issubclass(value_type, Enum):
-            result.append(value.name)
-        elif value_type is list:
-            raise Exception(f'List of lists are prohibited.')
+        if value_type is head_type:
+            append(head_serializer(value))
         else:
-            result.append(_serialize_primitive(value))
+            append(_get_list_item_serializer(value_type)(value))
     return result
 
 
-def _serialize_primitive(value):
+def _get_list_item_serializer(value_type: type) -> Callable[[Any], Any]:
+    if value_type is list:
+        raise Exception(f'List of lists are prohibited.')
+
+    serializer = _value_serializers.get(value_type)
+    if serializer is None:
+        serializer = _get_value_serializer(value_type)
+    return serializer
+
+
+_predicate_element_serializers: Dict[type, Callable[[Any], Any]] = dict(_primitive_serializers)
+"""Serializer for query predicate elements, cached per runtime type of the element."""
+
+
+def serialize_predicate_element(value: Any) -> Any:
+    """Serializes element of a query predicate. Primitive types and enums are serialized
+    the same way as in stored records, other values are passed as is.
+    """
     value_type = type(value)
-    if value_type == LocalMinute:
-        return date_ext.minute_to_iso_int(value)
-    elif value_type == dt.date:
-        return date_ext.date_to_iso_int(value)
-    elif value_type == dt.time:
-        return date_ext.time_to_iso_int(value)
-    elif value_type == dt.datetime:
-        return value
-    elif value_type == str:
-        return value
-    elif value_type == bool:
-        return value
-    elif value_type == int:
-        return value
-    elif value_type == float:
-        return value
-    elif value_type == ObjectId:
-        return value
-    # TODO: check for pymongo.binary.Binary to speed-up
-    elif value_type == np.ndarray:
-        return value.tolist()
-    else:
-        raise Exception(f'Cannot serialize type {value_type.__name__}')
+    serializer = _predicate_element_serializers.get(value_type)
+    if serializer is None:
+        serializer = _serialize_enum if issubclass(value_type, Enum) else _as_is
+        _predicate_element_serializers[value_type] = serializer
+    return serializer(value)
 
 
 # Deserialization: dict -> object
 
+_KIND_PRIMITIVE = 0
+_KIND_LIST = 1
+_KIND_KEY = 2
+_KIND_DATA = 3
+_KIND_ENUM = 4
+
+_member_kinds: Dict[Any, int] = dict()
+"""Kind of the member type which determines how it is deserialized, cached per member type."""
+
+
+def _get_member_kind(member_type) -> int:
+    """Classify and cache member type."""
+    # Only needed when a member type is classified for the first time
+    from typing_inspect import get_origin
+
+    if get_origin(member_type) is list:
+        kind = _KIND_LIST
+    elif issubclass(member_type, Key):
+        kind = _KIND_KEY
+    elif issubclass(member_type, Data):
+        kind = _KIND_DATA
+    elif issubclass(member_type, Enum):
+        kind = _KIND_ENUM
+    else:
+        kind = _KIND_PRIMITIVE
 
-def deserialize(dict_: Dict) -> TRecord:
-    data_set = dict_.pop('_dataset')
-    _key = dict_.pop('_key')
-    id_ = dict_.pop('_id')
+    _member_kinds[member_type] = kind
+    return kind
 
-    new_obj = _deserialize_class(dict_)
 
-    new_obj.__setattr__('data_set', data_set)
-    new_obj.__setattr__('_key', _key)
-    new_obj.__setattr__('id_', id_)
+def _get_list_item_type(member_type):
+    """Returns item type of the list member type."""
+    from typing_inspect import get_args
 
-    return new_obj
+    item_type = get_args(member_type)[0]
+    if item_type is list:
+        raise Exception(f'List of lists are prohibited.')
+    return item_type
+
+
+_field_maps: Dict[type, Dict[str, Tuple[Callable[[Any, Any], None], Any, int]]] = dict()
+"""Slot setter, member type and kind for each element name, cached per class.
+For list members, item type of the list is stored instead of the member type.
+"""
+
+
+def _get_slot_setter(type_: type, slot: str) -> Callable[[Any, Any], None]:
+    """Returns __set__ of the slot descriptor, or setattr for members that are not slots."""
+    descriptor = getattr(type_, slot, None)
+    if type(descriptor) is MemberDescriptorType:
+        return descriptor.__set__
+    return lambda obj, value: setattr(obj, slot, value)
+
+
+def _ignore(obj, value) -> None:
+    """Setter for elements that are read before the object is created."""
+    pass
+
+
+def _build_field_map(type_: type) -> Dict[str, Tuple[Callable[[Any, Any], None], Any, int]]:
+    """Build and cache the map from element name to slot setter, member type and kind for the class."""
+    field_map = dict()
+    for slot, member_type in get_type_hints(type_).items():
+        # Private members are not serialized
+        if slot.startswith('_'):
+            continue
+        try:
+            kind = _member_kinds.get(member_type)
+            if kind is None:
+                kind = _get_member_kind(member_type)
+        except TypeError:
+            # Not a supported member type, the error is raised
+            # when an element with this name is deserialized
+            continue
+        if kind == _KIND_LIST:
+            member_type = _get_list_item_type(member_type)
+        field_map[str_ext.to_pascal_case(slot)] = (_get_slot_setter(type_, slot), member_type, kind)
+
+    # Type name is read before the object is created
+    field_map['_t'] = (_ignore, str, _KIND_PRIMITIVE)
+    if issubclass(type_, Record):
+        field_map['_dataset'] = (_get_slot_setter(type_, 'data_set'), ObjectId, _KIND_PRIMITIVE)
+        field_map['_key'] = (_get_slot_setter(type_, '_key'), str, _KIND_PRIMITIVE)
+        field_map['_id'] = (_get_slot_setter(type_, 'id_'), ObjectId, _KIND_PRIMITIVE)
+
+    _field_maps[type_] = field_map
+    return field_map
+
+
+def _get_field(type_: type, field_map: Dict[str, Tuple[Callable[[Any, Any], None], Any, int]],
+               element_name: str) -> Tuple[Callable[[Any, Any], None], Any, int]:
+    """Resolve and cache element which is not in the field map by converting its name to snake case."""
+    slot = str_ext.to_snake_case(element_name)
+    member_type = get_type_hints(type_)[slot]
+    kind = _member_kinds.get(member_type)
+    if kind is None:
+        kind = _get_member_kind(member_type)
+    if kind == _KIND_LIST:
+        member_type = _get_list_item_type(member_type)
+
+    field = (_get_slot_setter(type_, slot), member_type, kind)
+    field_map[element_name] = field
+    return field
+
+
+def deserialize(dict_: Dict) -> TRecord:
+    # Record elements _dataset, _key and _id are in the field map of
+    # record types, so the passed dict is read in one pass and not modified
+    return _deserialize_class(dict_)
 
 
 def _deserialize_class(dict_: Dict[str, Any]) -> TRecord:
-    type_name: str = dict_.pop('_t')
+    type_name: str = dict_['_t']
 
     type_info = ClassInfo.get_type(type_name)
     new_obj = type_info()
 
+    field_map = _field_maps.get(type_info)
+    if field_map is None:
+        field_map = _build_field_map(type_info)
+
     for dict_key, dict_value in dict_.items():
-        slot = str_ext.to_snake_case(dict_key)
-        hints = get_type_hints(type_info)
-        member_type = hints[slot]
-        if get_origin(member_type) is not None and get_origin(member_type) is list:
+        field = field_map.get(dict_key)
+        if field is None:
+            field = _get_field(type_info, field_map, dict_key)
+        set_slot, member_type, kind = field
+
+        if kind == _KIND_PRIMITIVE:
+            deserialized_value = _deserialize_primitive(member_type, dict_value)
+        elif kind == _KIND_LIST:
             deserialized_value = _deserialize_list(member_type, dict_value)
-        elif issubclass(member_type, Key):
+        elif kind == _KIND_KEY:
             deserialized_value = member_type()
             deserialized_value.populate_from_string(dict_value)
-        elif issubclass(member_type, Data):
+        elif kind == _KIND_DATA:
             deserialized_value = _deserialize_class(dict_value)
-        elif issubclass(member_type, Enum):
-            deserialized_value = member_type[dict_value]
         else:
-            deserialized_value = _deserialize_primitive(member_type, dict_value)
+            deserialized_value = member_type[dict_value]
 
-        new_obj.__setattr__(slot, deserialized_value)
+        set_slot(new_obj, deserialized_value)
     return new_obj
 
 
-def _deserialize_list(type_: type, list_):
-    expected_item_type = get_args(type_)[0]
-    if issubclass(expected_item_type, Key):
+def _deserialize_list(expected_item_type: type, list_):
+    kind = _member_kinds.get(expected_item_type)
+    if kind is None:
+        kind = _get_member_kind(expected_item_type)
+
+    if kind == _KIND_PRIMITIVE:
+        return [_deserialize_primitive(expected_item_type, x) for x in list_]
+    elif kind == _KIND_KEY:
         result = []
         for item in list_:
             deserialized_key = expected_item_type()
             deserialized_key.populate_from_string(item)
             result.append(deserialized_key)
         return result
-    elif issubclass(expected_item_type, Data):
+    elif kind == _KIND_DATA:
         return [_deserialize_class(x) for x in list_]
-    elif issubclass(expected_item_type, Enum):
+    elif kind == _KIND_ENUM:
         return [expected_item_type[x] for x in list_]
-    elif expected_item_type is list:
-        raise Exception(f'List of lists are prohibited.')
     else:
-        return [_deserialize_primitive(expected_item_type, x) for x in list_]
+        raise Exception(f'List of lists are prohibited.')
 
 
 def _deserialize_primitive(expected_type, value):
-    if expected_type == str:
-        return value
-    elif expected_type == np.ndarray:
-        return np.array(value)
-    elif expected_type == bool:
-        return value
-    elif expected_type == LocalMinute:
-        return date_ext.iso_int_to_local_minute(value)
-    elif expected_type == dt.datetime:
-        return value
-    elif expected_type == dt.date:
-        return date_ext.iso_int_to_date(value)
-    elif expected_type == dt.time:
-        return date_ext.iso_int_to_time(value)
-    elif expected_type == int:
-        return value
-    elif expected_type == float:
-        return value
-    elif expected_type == ObjectId:
-        return value
-    else:
+    deserializer = _primitive_deserializers.get(expected_type)
+    if deserializer is None:
         raise TypeError(f'Cannot deduce type {expected_type}')
+    return deserializer(value)
+
+
+_primitive_deserializers: Dict[type, Callable[[Any], Any]] = {
+    str: _as_is,
+    int: _as_is,
+    float: _as_is,
+    bool: _as_is,
+    ObjectId: _as_is,
+    dt.datetime: _as_is,
+    dt.date: date_ext.iso_int_to_date,
+    dt.time: date_ext.iso_int_to_time,
+    LocalMinute: date_ext.iso_int_to_local_minute,
+    np.ndarray: np.array
+}
+"""Deserializers for primitive types, matched by exact expected type."""
@@ -1,13 +1,16 @@
+from __future__ import annotations
 from bson import ObjectId
-from typing import List
+from typing import List, TYPE_CHECKING
 
-from datacentric.platform.context import Context
 from datacentric.types.record import TypedRecord, TypedKey
 
+if TYPE_CHECKING:
+    from datacentric.platform.context import Context
+
 
 class DataSetKey(TypedKey['DataSet']):
     """Key for DataSet."""
-    __slots__ = ['data_set_name']
+    __slots__ = ('data_set_name',)
     data_set_name: str
 
     def __init__(self, id_: str = None):
@@ -36,19 +39,19 @@ class DataSet(TypedRecord[DataSetKey]):
     and does not have versions or its own DataSetData record. It is always last in the dataset
     lookup sequence. The root dataset cannot have Imports.
     """
-    __slots__ = ['data_set_name', 'non_temporal', 'imports']
+    __slots__ = ('data_set_name', 'non_temporal', 'imports')
 
     data_set_name: str
     non_temporal: bool
     imports: List[ObjectId]
 
-    def __init__(self):
+    def __init__(self, data_set_name: str = None, imports: List[ObjectId] = None, non_temporal: bool = None):
         super().__init__()
 
-        self.data_set_name = None
+        self.data_set_name = data_set_name
         """Unique dataset name."""
 
-        self.non_temporal = None
+        self.non_temporal = non_temporal
         """Flag indicating that the dataset is non-temporal even if the
         data source supports temporal data.
         For the data stored in datasets where non_temporal == False, a
@@ -64,7 +67,7 @@ class DataSet(TypedRecord[DataSetKey]):
         datasets in such data source are non-temporal.
         """
 
-        self.imports = None
+        self.imports = imports
         """List of datasets where records are looked up if they are
         not found in the current dataset.
         The specific lookup rules are specific to the data source
@@ -5,7 +5,7 @@ from datacentric.types.record import TypedKey, TypedRecord
 
 class DataSetDetailKey(TypedKey['DataSetDetail']):
     """Key for DataSetDetail."""
-    __slots__ = ['data_set_id']
+    __slots__ = ('data_set_id',)
     data_set_id: ObjectId
 
     def __init__(self):
@@ -29,7 +29,7 @@ class DataSetDetail(TypedRecord[DataSetDetailKey]):
     record to which it applies, rather than inside that record, so it
     is not affected by its own settings.
     """
-    __slots__ = ['data_set_id', 'read_only', 'cutoff_time', 'imports_cutoff_time']
+    __slots__ = ('data_set_id', 'read_only', 'cutoff_time', 'imports_cutoff_time')
     data_set_id: ObjectId
     read_only: bool
     cutoff_time: ObjectId
@@ -1,13 +1,13 @@
-from enum import IntFlag
+class DataSetFlags:
+    """Binary flags for the dataset create options.
 
+    Flags are plain int constants combined with | and tested with &.
+    """
 
-class DataSetFlags(IntFlag):
-    """Binary flags for the dataset create options."""
-
-    Default = 0
+    Default: int = 0
     """Specifies that no flags are defined."""
 
-    NonTemporal = 1
+    NonTemporal: int = 1
     """By default, a dataset will hold temporal data if the data source
     has temporal capability. Specify this flag to create a dataset that
     holds non-temporal data in a temporal data source.
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import groupby
 from bson.objectid import ObjectId
-from typing import List, Set, Dict, Iterable, Optional, TypeVar
+from typing import List, Set, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
 
 from datacentric.platform.storage.data_set_flags import DataSetFlags
 from datacentric.platform.storage.db_name import DbNameKey
@@ -9,12 +11,15 @@ from datacentric.platform.storage import DataSet, DataSetKey
 
 TRecord = TypeVar('TRecord', bound=Record)
 
+SAVE_BATCH_SIZE = 64
+"""Number of records passed to save_one inside batch() after which they are saved."""
+
 
 class DataSourceKey(TypedKey['DataSource']):
     """Key class for DataSource.
     Record associated with this key is stored in root dataset.
     """
-    __slots__ = ['data_source_name']
+    __slots__ = ('data_source_name',)
 
     data_source_name: str
     cache: str = 'Cache'
@@ -41,15 +46,18 @@ class DataSource(RootRecord[DataSourceKey], ABC):
     This record is stored in root dataset.
     """
 
-    __slots__ = ('data_source_name', 'db_name', 'non_temporal', 'readonly')
+    __slots__ = ('data_source_name', 'db_name', 'non_temporal', 'readonly', '_common_id_cache', '__pending_saves')
 
     _empty_id = ObjectId('000000000000000000000000')
+    _empty_id_binary: bytes = _empty_id.binary
     common_id: str = 'Common'
 
     data_source_name: str
     db_name: DbNameKey
     non_temporal: bool
     readonly: bool
+    _common_id_cache: Optional[ObjectId]
+    __pending_saves: Optional[List[Tuple[type, ObjectId, Record]]]
 
     def __init__(self):
         super().__init__()
@@ -79,6 +87,19 @@ class DataSource(RootRecord[DataSourceKey], ABC):
         self.readonly = None
         """Use this flag to mark data source as readonly."""
 
+        self._common_id_cache = None
+        """ObjectId of the latest Common dataset, set on first call to get_common
+        and updated when Common dataset is saved to root dataset."""
+
+        self.__pending_saves = None
+        """Record type, dataset and record for each save_one call inside batch()
+        that is not saved yet, in the order of the calls. None outside batch()."""
+
+    @staticmethod
+    def _is_root(id_: ObjectId) -> bool:
+        """Returns true if the ObjectId is the ObjectId of root dataset, compared by its raw bytes."""
+        return id_.binary == DataSource._empty_id_binary
+
     @abstractmethod
     def create_ordered_object_id(self) -> ObjectId:
         """The returned ObjectIds have the following order guarantees:
@@ -233,14 +254,79 @@ class DataSource(RootRecord[DataSourceKey], ABC):
 
         This method guarantees that ObjectIds of the saved records will be in
         strictly increasing order.
+
+        Inside batch(), the record is saved together with the records
+        passed to other save_one calls, see batch() for details.
+        """
+        pending_saves = self.__pending_saves
+        if pending_saves is None:
+            self.save_many(record_type, (record,), save_to)
+            return
+
+        pending_saves.append((record_type, save_to, record))
+        if len(pending_saves) >= SAVE_BATCH_SIZE:
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Within this context, records passed to save_one are collected
+        and saved with one save_many call for each sequence of consecutive
+        records with the same type and dataset, every SAVE_BATCH_SIZE records
+        and when the context exits. Nested batch() joins the enclosing one.
+
+        Until they are saved, record.id_ and record.data_set of the collected
+        records are not set, and the records are not visible to load and query
+        methods. ObjectIds are assigned in the order of save_one calls.
         """
-        self.save_many(record_type, [record], save_to)
+        if self.__pending_saves is not None:
+            yield
+            return
+
+        self.__pending_saves = []
+        try:
+            yield
+        finally:
+            # Records collected before an error are saved as they would be without batch(),
+            # the data source leaves batch mode even if they cannot be saved
+            try:
+                self.flush()
+            finally:
+                self.__pending_saves = None
+
+    def flush(self) -> None:
+        """Save records passed to save_one inside batch() that are not saved yet.
+        Save methods of the data source call this method before saving
+        other records to keep their ObjectIds in the order of the calls.
+
+        If saving a group of records fails, that group and the groups after
+        it remain pending and the error is raised.
+        """
+        pending_saves = self.__pending_saves
+        if not pending_saves:
+            return
+
+        # Cleared before saving because save_many calls this method
+        self.__pending_saves = []
+        saved_count = 0
+        for (record_type, save_to), group in groupby(pending_saves, key=lambda x: (x[0], x[1])):
+            records = [record for _, _, record in group]
+            try:
+                self.save_many(record_type, records, save_to)
+            except Exception:
+                # Records that are not saved remain pending, ahead of any collected since
+                self.__pending_saves = pending_saves[saved_count:] + self.__pending_saves
+                raise
+            saved_count += len(records)
 
     def get_common(self) -> ObjectId:
         """Return ObjectId of the latest Common dataset.
         Common dataset is always stored in root dataset.
         """
-        return self.get_data_set(DataSource.common_id, DataSource._empty_id)
+        common_id = self._common_id_cache
+        if common_id is None:
+            common_id = self.get_data_set(DataSource.common_id, DataSource._empty_id)
+            self._common_id_cache = common_id
+        return common_id
 
     def get_data_set(self, data_set_name: str, load_from: ObjectId) -> ObjectId:
         """Get ObjectId of the dataset with the specified name.
@@ -251,7 +337,7 @@ class DataSource(RootRecord[DataSourceKey], ABC):
             raise Exception(f'Dataset {data_set_name} is not found in data store {self.data_source_name}.')
         return result
 
-    def create_common(self, flags: DataSetFlags = None) -> ObjectId:
+    def create_common(self, flags: int = None) -> ObjectId:
         """Create Common dataset with the specified flags.
 
         The flags may be used, among other things, to specify
@@ -269,32 +355,29 @@ class DataSource(RootRecord[DataSourceKey], ABC):
         This method updates in-memory dataset cache to include
         the created dataset.
         """
-        if flags is None:
-            flags = DataSetFlags.Default
         return self.create_data_set(DataSource.common_id, DataSource._empty_id, flags=flags)
 
     def create_data_set(self, data_set_name: str, parent_data_set: ObjectId, imports: List[ObjectId] = None,
-                        flags: DataSetFlags = None) -> ObjectId:
+                        flags: int = None) -> ObjectId:
         """Create dataset with the specified data_set_name, parent_data_set, imports,
         and flags.
 
         This method updates in-memory dataset cache to include
         the created dataset.
         """
-        if flags is None:
-            flags = DataSetFlags.Default
+        # The default list is created here and does not need to be copied
         if imports is None:
             imports = [parent_data_set]
+        else:
+            imports = list(imports)
 
-        result = DataSet()
-        result.data_set_name = data_set_name
-        if imports is not None:
-            result.imports = [x for x in imports]
-
-        if (self.non_temporal is not None and self.non_temporal) or \
-                flags & DataSetFlags.NonTemporal == DataSetFlags.NonTemporal:
-            result.non_temporal = True
+        if self.non_temporal or (flags is not None and flags & DataSetFlags.NonTemporal):
+            non_temporal = True
+        else:
+            non_temporal = None
 
+        # Attributes are passed to the constructor instead of being set after default values
+        result = DataSet(data_set_name, imports, non_temporal)
         self.save_data_set(result, parent_data_set)
 
         return result.id_
@@ -1,23 +1,36 @@
+import itertools
+import os
+import struct
+import threading
+import time
 from abc import ABC
 
 from bson import ObjectId
 from pymongo import MongoClient
 from pymongo.database import Database
+from typing import Dict, Iterator, Optional, Set, Tuple
 
 from datacentric.platform.context import Context
 from datacentric.platform.storage import DataSource
 from datacentric.platform.storage.instance_type import InstanceType
 
+_pack_object_id_time = struct.Struct('>I').pack
+
 
 class MongoDataSource(DataSource, ABC):
     """Abstract base class for data source implementations based on MongoDB.
     This class provides functionality shared by all MongoDB data source types.
     """
-    __slots__ = ['mongo_server', '__instance_type', '__client', '__db', '__db_name', '__prev_object_id']
+    __slots__ = ('mongo_server', '__instance_type', '__client', '__db', '__db_name', '__object_id_pid',
+                 '__object_id_random', '__object_id_counter', '__prev_object_id_binary')
 
     # Class attributes
-    __prohibited_symbols = '/\\. "$*<>:|?'
+    __prohibited_symbols = frozenset('/\\. "$*<>:|?')
+    __droppable_instance_types = frozenset((InstanceType.DEV, InstanceType.USER, InstanceType.TEST))
     __max_db_name_length = 64
+    __validated_db_names: Set[str] = set()
+    __clients: Dict[Tuple[int, Optional[str]], MongoClient] = dict()
+    __clients_lock = threading.Lock()
 
     # Instance attributes
     mongo_server: str
@@ -26,7 +39,10 @@ class MongoDataSource(DataSource, ABC):
     __db: Database
     __db_name: str
     __client: MongoClient
-    __prev_object_id: ObjectId
+    __object_id_pid: int
+    __object_id_random: bytes
+    __object_id_counter: Iterator[int]
+    __prev_object_id_binary: bytes
 
     def __init__(self):
         super().__init__()
@@ -39,7 +55,8 @@ class MongoDataSource(DataSource, ABC):
         self.__client = None
         self.__db = None
         self.__db_name = None
-        self.__prev_object_id = DataSource._empty_id
+        self.__reset_object_id_random()
+        self.__prev_object_id_binary = DataSource._empty_id_binary
 
     def init(self, context: Context) -> None:
         """Set context and perform validation of the record's data,
@@ -61,36 +78,89 @@ class MongoDataSource(DataSource, ABC):
 
         self.__db_name = self.db_name.value
         self.__instance_type = self.db_name.instance_type
-        if any(x in self.__db_name for x in MongoDataSource.__prohibited_symbols):
-            raise Exception(f'MongoDB database name {self.__db_name} contains a space or another '
-                            f'prohibited character from the following list: /\\.\"$*<>:|?')
 
-        if len(self.__db_name) > MongoDataSource.__max_db_name_length:
-            raise Exception(f'MongoDB database name {self.__db_name} exceeds the maximum length of 64 characters.')
+        # Names that passed validation are not validated again when data sources are initialized
+        if self.__db_name not in MongoDataSource.__validated_db_names:
+            if not MongoDataSource.__prohibited_symbols.isdisjoint(self.__db_name):
+                raise Exception(f'MongoDB database name {self.__db_name} contains a space or another '
+                                f'prohibited character from the following list: /\\.\"$*<>:|?')
+
+            if len(self.__db_name) > MongoDataSource.__max_db_name_length:
+                raise Exception(f'MongoDB database name {self.__db_name} exceeds the maximum length of 64 characters.')
+
+            MongoDataSource.__validated_db_names.add(self.__db_name)
 
-        self.__client = MongoClient(self.mongo_server)
+        self.__client = MongoDataSource.__get_client(self.mongo_server)
         self.__db = self.__client.get_database(self.__db_name)
 
+    @staticmethod
+    def __get_client(mongo_server: Optional[str]) -> MongoClient:
+        """Returns client for the specified Mongo server, shared by all data sources
+        in the process. Each client maintains its own connection pool and
+        monitoring threads, and is safe to use from multiple threads.
+
+        Clients are cached per process id, so that a forked process does not
+        use the client created in its parent, which is not fork safe.
+        """
+        client_key = (os.getpid(), mongo_server)
+        client = MongoDataSource.__clients.get(client_key)
+        if client is None:
+            with MongoDataSource.__clients_lock:
+                client = MongoDataSource.__clients.get(client_key)
+                if client is None:
+                    client = MongoClient(mongo_server)
+                    MongoDataSource.__clients[client_key] = client
+        return client
+
     @property
     def db(self) -> Database:
         """Interface to Mongo database in pymongo driver."""
         return self.__db
 
     def create_ordered_object_id(self) -> ObjectId:
-        result = ObjectId()
+        """Returns ObjectId that is strictly greater than the previous one
+        returned by this method.
+
+        ObjectIds have the same layout as the ones generated by the driver:
+        seconds since epoch, a random value generated once per data source
+        instance and process, and a counter of this instance. They are built
+        from bytes and compared as bytes, without the lock of the driver.
+        As in the driver, the random value and the counter are generated
+        again in a process forked after the data source was created, so that
+        it does not produce the same ObjectIds as its parent.
+
+        When the result is not greater than the previous ObjectId (the clock
+        moved back, or the counter wrapped around within the same second),
+        the previous ObjectId incremented by one is used instead. This keeps
+        its timestamp and random part and advances the counter part without
+        retrying the generation. If the previous ObjectId has a different
+        random part, because it was created by the parent process or the
+        increment carried over into it, the second after its timestamp is
+        used with the random part and counter of this process instead.
+        """
+        if self.__object_id_pid != os.getpid():
+            self.__reset_object_id_random()
 
-        retry_count = 0
-        while result <= self.__prev_object_id:
-            retry_count = retry_count + 1
-            if retry_count == 0:
-                self.context.log.warning('MongoDB generated ObjectId not in increasing order, retrying.')
-                result = ObjectId()
+        object_id_random = self.__object_id_random
+        counter_binary = (next(self.__object_id_counter) & 0xFFFFFF).to_bytes(3, 'big')
+        result = _pack_object_id_time(int(time.time())) + object_id_random + counter_binary
+
+        prev_object_id_binary = self.__prev_object_id_binary
+        if result <= prev_object_id_binary:
+            if prev_object_id_binary[4:9] == object_id_random:
+                result = (int.from_bytes(prev_object_id_binary, 'big') + 1).to_bytes(12, 'big')
+            else:
+                prev_time = int.from_bytes(prev_object_id_binary[:4], 'big')
+                result = _pack_object_id_time(prev_time + 1) + object_id_random + counter_binary
 
-        if retry_count != 0:
-            self.context.log.warning(f'Generated ObjectId in increasing order after {retry_count} retries.')
+        self.__prev_object_id_binary = result
+        return ObjectId(result)
 
-        self.__prev_object_id = result
-        return result
+    def __reset_object_id_random(self) -> None:
+        """Generates random value and initial counter of ObjectIds for the current process."""
+        self.__object_id_pid = os.getpid()
+        self.__object_id_random = os.urandom(5)
+        self.__object_id_counter = itertools.count(int.from_bytes(os.urandom(3), 'big'))
 
     def delete_db(self) -> None:
         """Permanently deletes (drops) the database with all records
@@ -107,7 +177,7 @@ class MongoDataSource(DataSource, ABC):
             raise Exception(f'Attempting to drop (delete) database for the data source {self.data_source_name} '
                             f'where ReadOnly flag is set.')
         if self.__client is not None and self.__db is not None:
-            if self.__instance_type in [InstanceType.DEV, InstanceType.USER, InstanceType.TEST]:
+            if self.__instance_type in MongoDataSource.__droppable_instance_types:
                 self.__client.drop_database(self.__db)
             else:
                 raise Exception(f'As an extra safety measure, database {self.__db_name} cannot be '
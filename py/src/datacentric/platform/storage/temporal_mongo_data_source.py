@@ -1,8 +1,10 @@
 import datetime as dt
-from typing import Dict, Optional, TypeVar, Set, Iterable
+import time
+from typing import Any, Dict, List, Optional, Tuple, TypeVar, Iterable
 from bson import ObjectId
 from pymongo.collection import Collection
 
+from datacentric.extensions.lru_dict import LruDict
 from datacentric.platform.storage.data_set_detail import DataSetDetail, DataSetDetailKey
 from datacentric.platform.storage.temporal_mongo_query import TemporalMongoQuery
 from datacentric.types.record import Record, TypedKey, DeletedRecord
@@ -12,6 +14,15 @@ from datacentric.platform.serialization.serializer import serialize, deserialize
 
 TRecord = TypeVar('TRecord', bound=Record)
 
+_MISSING = object()
+"""Sentinel for cache lookups where None is a valid cached value."""
+
+DATA_SET_CACHE_SIZE = 1024
+"""Maximum number of dataset name lookups cached by each data source."""
+
+QUERY_CACHE_SIZE = 256
+"""Maximum number of query results cached by each data source."""
+
 
 class TemporalMongoDataSource(MongoDataSource):
     """Temporal data source with datasets based on MongoDB.
@@ -23,24 +34,35 @@ class TemporalMongoDataSource(MongoDataSource):
     records are looked up across a hierarchy of datasets, including the dataset
     itself, its direct imports, imports of imports, etc., ordered by dataset's
     ObjectId"""
-    __slots__ = ('cutoff_time', '__collection_dict', '__data_set_dict', '__data_set_parent_dict',
-                 '__data_set_detail_dict', '__import_dict')
+    __slots__ = ('cutoff_time', 'query_cache_ttl', '__collection_dict', '__data_set_dict', '__data_set_parent_dict',
+                 '__data_set_detail_dict', '__import_dict', '__query_cache', '__query_cache_generation')
+
+    # Class attributes
+    __root_lookup_list = (DataSource._empty_id,)
 
+    # Instance attributes
     cutoff_time: Optional[ObjectId]
+    query_cache_ttl: Optional[float]
 
     __collection_dict: Dict[type, Collection]
-    __data_set_dict: Dict[str, ObjectId]
-    __data_set_parent_dict: Dict[ObjectId, ObjectId]
-    __data_set_detail_dict: Dict[ObjectId, DataSetDetail]
-    __import_dict: Dict[ObjectId, Set[ObjectId]]
+    __data_set_dict: Dict[Tuple[str, bytes], ObjectId]
+    # Dictionaries keyed by dataset ObjectId use its 12 raw bytes as the key,
+    # which are hashed and compared without calling ObjectId methods
+    __data_set_parent_dict: Dict[bytes, ObjectId]
+    __data_set_detail_dict: Dict[bytes, DataSetDetail]
+    __import_dict: Dict[bytes, Tuple[ObjectId, ...]]
+    __query_cache: LruDict
+    __query_cache_generation: int
 
     def __init__(self):
         super().__init__()
         self.__collection_dict = dict()
-        self.__data_set_dict = dict()
+        self.__data_set_dict = LruDict(DATA_SET_CACHE_SIZE)
         self.__data_set_parent_dict = dict()
         self.__data_set_detail_dict = dict()
         self.__import_dict = dict()
+        self.__query_cache = LruDict(QUERY_CACHE_SIZE)
+        self.__query_cache_generation = 0
 
         self.cutoff_time = None
         """Records with ObjectId that is greater than or equal to cutoff_time
@@ -55,6 +77,14 @@ class TemporalMongoDataSource(MongoDataSource):
         two values will be used.
         """
 
+        self.query_cache_ttl = None
+        """Time in seconds for which documents returned by a query are cached
+        and reused by queries with the same pipeline. The cache is cleared by
+        any write to this data source and holds at most QUERY_CACHE_SIZE results.
+        Results with more than QUERY_CACHE_MAX_DOCUMENTS documents are not cached.
+        Query results are not cached if None.
+        """
+
     def load_or_null(self, record_type: type, id_: ObjectId) -> Optional[TRecord]:
         """Load record by its ObjectId.
 
@@ -66,29 +96,34 @@ class TemporalMongoDataSource(MongoDataSource):
             if id_ >= self.cutoff_time:
                 return None
 
-        pipeline = [
-            {'$match': {'_id': {'$eq': id_}}},
-            {'$limit': 1}
-        ]
         collection = self._get_or_create_collection(record_type)
-        cursor = collection.aggregate(pipeline)
-        if cursor.alive:
-            cursor_next = cursor.next()
-            result = deserialize(cursor_next)
+        cursor_next = collection.find_one({'_id': id_})
+        if cursor_next is None:
+            return None
+
+        return self.__record_from_document_or_none(record_type, id_, cursor_next)
 
-            if result is not None and not isinstance(result, DeletedRecord):
+    def __record_from_document_or_none(self, record_type: type, id_: ObjectId,
+                                       document: Dict[str, Any]) -> Optional[TRecord]:
+        """Deserializes document loaded by ObjectId, returns None if it is
+        DeletedRecord or is excluded by cutoff_time of its dataset.
+        """
+        # DeletedRecord is checked by exact type before the type check
+        # because it is stored in the same collection as the requested type
+        # but is never derived from it
+        result = deserialize(document)
+        if type(result) is DeletedRecord:
+            return None
 
-                cutoff_time = self.get_cutoff_time(result.data_set)
-                if cutoff_time is not None:
-                    if id_ >= cutoff_time:
-                        return None
+        cutoff_time = self.get_cutoff_time(result.data_set)
+        if cutoff_time is not None and id_ >= cutoff_time:
+            return None
 
-                is_requested_instance = isinstance(result, record_type)
-                if not is_requested_instance:
-                    raise Exception(f'Stored type {type(result).__name__} for ObjectId={id_} and '
-                                    f'Key={result.key} is not an instance of the requested type {record_type.__name__}.')
-                result.init(self.context)
-                return result
+        if not isinstance(result, record_type):
+            raise Exception(f'Stored type {type(result).__name__} for ObjectId={id_} and '
+                            f'Key={result.key} is not an instance of the requested type {record_type.__name__}.')
+        result.init(self.context)
+        return result
 
     def load_or_null_by_key(self, key_: TypedKey[Record], load_from: ObjectId) -> Optional[TRecord]:
         """Load record by string key from the specified dataset or
@@ -113,34 +148,27 @@ class TemporalMongoDataSource(MongoDataSource):
         """
         key_value = key_.value
 
-        base_pipe = [{"$match": {"_key": key_value}}]
-        pipe_with_constraints = self.apply_final_constraints(base_pipe, load_from)
-        ordered_pipe = pipe_with_constraints
-        ordered_pipe.extend(
-            [
-                {"$sort": {"_dataset": -1}},
-                {"$sort": {"_id": -1}},
-                {'$limit': 1}
-            ]
-        )
+        # Same constraints as apply_final_constraints, expressed as a find filter
+        query = self._get_data_set_filter(load_from)
+        query['_key'] = key_value
 
         record_type = ClassInfo.get_record_from_key(type(key_))
         collection = self._get_or_create_collection(record_type)
 
-        cursor = collection.aggregate(ordered_pipe)
-        if cursor.alive:
-            cursor_next = cursor.next()
-            result = deserialize(cursor_next)
+        cursor_next = collection.find_one(query, sort=[('_dataset', -1), ('_id', -1)])
+        if cursor_next is None:
+            return None
 
-            if result is not None and not isinstance(result, DeletedRecord):
+        result = deserialize(cursor_next)
+        if type(result) is DeletedRecord:
+            return None
 
-                is_proper_record = isinstance(result, record_type)
-                if not is_proper_record:
-                    raise Exception(f'Stored type {type(result).__name__} for Key={key_value} in '
-                                    f'data_set={load_from} is not an instance of '
-                                    f'the requested type {record_type.__name__}.')
-                result.init(self.context)
-                return result
+        if not isinstance(result, record_type):
+            raise Exception(f'Stored type {type(result).__name__} for Key={key_value} in '
+                            f'data_set={load_from} is not an instance of '
+                            f'the requested type {record_type.__name__}.')
+        result.init(self.context)
+        return result
 
     def get_query(self, record_type: type, load_from: ObjectId) -> TemporalMongoQuery:
         """Get query for the specified type.
@@ -173,23 +201,39 @@ class TemporalMongoDataSource(MongoDataSource):
         This method guarantees that ObjectIds of the saved records will be in
         strictly increasing order.
         """
+        # Records collected by batch() are saved first to keep ObjectIds in call order
+        self.flush()
+        self.__clear_query_cache()
+
         self._check_not_readonly(save_to)
         collection = self._get_or_create_collection(record_type)
         if records is None:
             return None
 
+        # Bind to locals once per batch, records are serialized in the same
+        # pass so that records may also be passed as a generator
+        create_ordered_object_id = self.create_ordered_object_id
+        context = self.context
+        documents = []
+        append_document = documents.append
         for record in records:
-            record_id = self.create_ordered_object_id()
+            record_id = create_ordered_object_id()
             if record_id <= save_to:
                 raise Exception(f'TemporalId={record_id} of a record must be greater than '
                                 f'TemporalId={save_to} of the dataset where it is being saved.')
             record.id_ = record_id
             record.data_set = save_to
-            record.init(self.context)
+            record.init(context)
+            append_document(serialize(record))
+        if not documents:
+            return None
+
+        # Ids are assigned above, so the server does not have to preserve
+        # insertion order within the batch
         if self.is_non_temporal(record_type, save_to):
-            collection.insert_many([serialize(x) for x in records])  # TODO: replace by upsert
+            collection.insert_many(documents, ordered=False)  # TODO: replace by upsert
         else:
-            collection.insert_many([serialize(x) for x in records])
+            collection.insert_many(documents, ordered=False)
 
     def delete(self, key: TypedKey[Record], delete_in: ObjectId) -> None:
         """Write a DeletedRecord in delete_in dataset for the specified key
@@ -200,6 +244,9 @@ class TemporalMongoDataSource(MongoDataSource):
         To avoid an additional roundtrip to the data store, the delete
         marker is written even when the record does not exist.
         """
+        self.flush()
+        self.__clear_query_cache()
+
         self._check_not_readonly(delete_in)
         record = DeletedRecord()
         record.key = key.value
@@ -210,7 +257,18 @@ class TemporalMongoDataSource(MongoDataSource):
         record_type = ClassInfo.get_record_from_key(type(key))
         collection = self._get_or_create_collection(record_type)
 
-        collection.insert_one(record)
+        collection.insert_one(serialize(record))
+
+    def delete_db(self) -> None:
+        """Permanently deletes (drops) the database with all records
+        in it without the possibility to recover them later, and clears
+        cached query results.
+
+        ATTENTION - THIS METHOD WILL DELETE ALL DATA WITHOUT
+        THE POSSIBILITY OF RECOVERY. USE WITH CAUTION.
+        """
+        super().delete_db()
+        self.__clear_query_cache()
 
     def apply_final_constraints(self, pipeline, load_from: ObjectId):
         """Apply the final constraints after all prior where clauses but before sort_by clause:
@@ -218,68 +276,101 @@ class TemporalMongoDataSource(MongoDataSource):
         * The constraint on dataset lookup list, restricted by cutoff_time (if not none)
         * The constraint on ID being strictly less than cutoff_time (if not none).
         """
-        data_set_lookup_list = self.get_data_set_lookup_list(load_from)
-        pipeline.append({'$match': {"_dataset": {"$in": data_set_lookup_list}}})
-
-        cutoff_time = self.get_cutoff_time(load_from)
-        if cutoff_time is not None:
-            pipeline.append({'$match': {'_id': {'$lte': cutoff_time}}})
-
+        pipeline.append({'$match': self._get_data_set_filter(load_from)})
         return pipeline
 
     def get_data_set_or_none(self, data_set_name: str, load_from: ObjectId) -> Optional[ObjectId]:
         """Get ObjectId of the dataset with the specified name.
         Returns null if not found.
         """
-        if data_set_name in self.__data_set_dict:
-            return self.__data_set_dict[data_set_name]
-        data_set_key = DataSetKey()
-        data_set_key.data_set_name = data_set_name
+        # Common dataset is stored in root dataset and cached by get_common
+        common_id = self._common_id_cache
+        if common_id is not None and data_set_name == DataSource.common_id and \
+                DataSource._is_root(load_from):
+            return common_id
 
-        data_set_record = self.load_or_null_by_key(data_set_key, load_from)
+        # Cached per name and dataset it is loaded from, the same name may
+        # resolve to different datasets when loaded from different datasets
+        data_set_dict_key = (data_set_name, load_from.binary)
+        data_set_id = self.__data_set_dict.get(data_set_dict_key)
+        if data_set_id is not None:
+            return data_set_id
+
+        data_set_record = self.load_or_null_by_key(DataSetKey(data_set_name), load_from)
 
         if data_set_record is None:
             return None
 
-        self.__data_set_dict[data_set_name] = data_set_record.id_
-        self.__data_set_parent_dict[data_set_record.id_] = data_set_record.data_set
+        self.__data_set_dict[data_set_dict_key] = data_set_record.id_
+        data_set_record_key = data_set_record.id_.binary
+        self.__data_set_parent_dict[data_set_record_key] = data_set_record.data_set
 
-        if data_set_record.id_ not in self.__import_dict:
-            import_set = self._build_data_set_lookup_list(data_set_record)
-            self.__import_dict[data_set_record.id_] = import_set
+        if data_set_record_key not in self.__import_dict:
+            lookup_list = self._build_data_set_lookup_list(data_set_record)
+            self.__import_dict[data_set_record_key] = lookup_list
 
         return data_set_record.id_
 
     def save_data_set(self, data_set: DataSet, save_to: ObjectId) -> None:
         """Save new version of the dataset and update in-memory cache to the saved dataset."""
-        self.save_one(DataSet, data_set, save_to)
-        self.__data_set_dict[data_set.key] = data_set.id_
-        self.__data_set_parent_dict[data_set.id_] = data_set.data_set
+        # Saved immediately even inside batch(), its ObjectId is cached below
+        self.save_many(DataSet, (data_set,), save_to)
+
+        # The name may be cached for datasets that import save_to, where it may
+        # now resolve to the saved version, so all cached entries for it are dropped
+        data_set_dict = self.__data_set_dict
+        for data_set_dict_key in [key for key in data_set_dict if key[0] == data_set.key]:
+            del data_set_dict[data_set_dict_key]
+        data_set_dict[(data_set.key, save_to.binary)] = data_set.id_
+        self.__data_set_parent_dict[data_set.id_.binary] = data_set.data_set
 
         lookup_list = self._build_data_set_lookup_list(data_set)
-        self.__import_dict[data_set.id_] = lookup_list
+        self.__import_dict[data_set.id_.binary] = lookup_list
 
-    def get_data_set_lookup_list(self, load_from: ObjectId) -> Iterable[ObjectId]:
+        if DataSource._is_root(save_to) and data_set.key == DataSource.common_id:
+            self._common_id_cache = data_set.id_
+
+    def get_data_set_lookup_list(self, load_from: ObjectId) -> Tuple[ObjectId, ...]:
         """Returns enumeration of import datasets for specified dataset data,
         including imports of imports to unlimited depth with cyclic
         references and duplicates removed.
         """
-        if load_from == DataSource._empty_id:
-            return [DataSource._empty_id]
+        if DataSource._is_root(load_from):
+            return TemporalMongoDataSource.__root_lookup_list
 
-        if load_from in self.__import_dict:
-            return self.__import_dict[load_from]
+        lookup_list = self.__import_dict.get(load_from.binary)
+        if lookup_list is not None:
+            return lookup_list
 
         else:
-            data_set_data: DataSet = self.load_or_null(DataSet, load_from)
-            if data_set_data is None:
-                raise Exception(f'Dataset with ObjectId={load_from} is not found.')
-            if data_set_data.data_set != DataSource._empty_id:
-                raise Exception(f'Dataset with ObjectId={load_from} is not stored in root dataset.')
+            data_set_data = self.__load_imported_data_sets([load_from])[0]
             result = self._build_data_set_lookup_list(data_set_data)
-            self.__import_dict[load_from] = result
+            self.__import_dict[load_from.binary] = result
             return result
 
+    def __load_imported_data_sets(self, data_set_ids: List[ObjectId]) -> List[DataSet]:
+        """Loads dataset records to build their lookup lists with one query, in
+        the order of the ObjectIds. Imported datasets must be stored in root dataset.
+        """
+        collection = self._get_or_create_collection(DataSet)
+        documents = {document['_id'].binary: document
+                     for document in collection.find({'_id': {'$in': data_set_ids}})}
+
+        cutoff_time = self.cutoff_time
+        result = []
+        for data_set_id in data_set_ids:
+            document = documents.get(data_set_id.binary)
+            data_set_data = None
+            # Same constraints as load_or_null
+            if document is not None and (cutoff_time is None or data_set_id < cutoff_time):
+                data_set_data = self.__record_from_document_or_none(DataSet, data_set_id, document)
+            if data_set_data is None:
+                raise Exception(f'Dataset with ObjectId={data_set_id} is not found.')
+            if not DataSource._is_root(data_set_data.data_set):
+                raise Exception(f'Dataset with ObjectId={data_set_id} is not stored in root dataset.')
+            result.append(data_set_data)
+        return result
+
     def get_data_set_detail_or_none(self, detail_for: ObjectId) -> Optional[DataSetDetail]:
         """Get detail of the specified dataset.
 
@@ -287,17 +378,20 @@ class TemporalMongoDataSource(MongoDataSource):
 
         The detail is loaded for the dataset specified in the first argument.
         """
-        if detail_for == DataSource._empty_id:
+        if DataSource._is_root(detail_for):
             return None
-        if detail_for in self.__data_set_detail_dict:
-            return self.__data_set_detail_dict[detail_for]
+        # None is cached for datasets without detail record
+        detail_for_key = detail_for.binary
+        result = self.__data_set_detail_dict.get(detail_for_key, _MISSING)
+        if result is not _MISSING:
+            return result
 
-        parent_id = self.__data_set_parent_dict[detail_for]
+        parent_id = self.__data_set_parent_dict[detail_for_key]
         data_set_detail_key = DataSetDetailKey()
         data_set_detail_key.data_set_id = detail_for
 
         result = self.load_or_null_by_key(data_set_detail_key, parent_id)
-        self.__data_set_detail_dict[detail_for] = result
+        self.__data_set_detail_dict[detail_for_key] = result
         return result
 
     def is_non_temporal(self, record_type: type, data_set_id: ObjectId) -> bool:
@@ -311,7 +405,7 @@ class TemporalMongoDataSource(MongoDataSource):
             return True
         if hasattr(record_type, 'non_temporal') and record_type.non_temporal:
             return True
-        if data_set_id == DataSource._empty_id:
+        if DataSource._is_root(data_set_id):
             return False
         data_set_detail: DataSet = self.load_or_null(DataSet, data_set_id)
         if data_set_detail is not None and data_set_detail.non_temporal:
@@ -334,24 +428,22 @@ class TemporalMongoDataSource(MongoDataSource):
         cutoff_time applies to both the records stored in the dataset itself,
         and the reports loaded through the imports list.
         """
-        data_set_detail = self.get_data_set_detail_or_none(data_set_id)
-        if data_set_detail is not None:
-            data_set_cutoff_time = data_set_detail.cutoff_time
-        else:
-            data_set_cutoff_time = None
+        cutoff_time = self.cutoff_time
 
-        # Min of (self.cutoff_time, data_set_cutoff_time)
-        if self.cutoff_time is not None and data_set_cutoff_time is not None:
-            if self.cutoff_time < data_set_cutoff_time:
-                return self.cutoff_time
-            else:
-                return data_set_cutoff_time
-
-        if self.cutoff_time is None:
+        data_set_detail = self.get_data_set_detail_or_none(data_set_id)
+        if data_set_detail is None or data_set_detail.cutoff_time is None:
             # Covers the case if both are None
+            return cutoff_time
+
+        data_set_cutoff_time = data_set_detail.cutoff_time
+        if cutoff_time is None:
             return data_set_cutoff_time
 
-        return self.cutoff_time
+        # Min of (self.cutoff_time, data_set_cutoff_time)
+        if cutoff_time < data_set_cutoff_time:
+            return cutoff_time
+        else:
+            return data_set_cutoff_time
 
     def get_imports_cutoff_time(self, data_set_id: ObjectId) -> Optional[ObjectId]:
         """Gets ImportsCutoffTime from the dataset detail record.
@@ -375,24 +467,122 @@ class TemporalMongoDataSource(MongoDataSource):
             return data_set_detail.imports_cutoff_time
 
     def _get_or_create_collection(self, type_: type) -> Collection:
-        if type_ in self.__collection_dict:
-            return self.__collection_dict[type_]
+        collection = self.__collection_dict.get(type_)
+        if collection is not None:
+            return collection
+
+        # Types derived from the same root type share the collection,
+        # cache it under both keys so that other derived types can reuse it
         root_type = ClassInfo.get_root_type(type_)
-        collection_name = root_type.__name__
-        collection = self.db.get_collection(collection_name)
+        collection = self.__collection_dict.get(root_type)
+        if collection is None:
+            collection = self.db.get_collection(root_type.__name__)
+            self.__collection_dict[root_type] = collection
         self.__collection_dict[type_] = collection
         return collection
 
-    def _build_data_set_lookup_list(self, data_set_record: DataSet):
-        result = set()
-        self._fill_data_set_lookup_set(data_set_record, result)
+    def _get_cached_query(self, query_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns documents cached for the query pipeline, or None if they are
+        not cached. Expired documents are removed from the cache.
+        """
+        cached_query = self.__query_cache.get(query_key)
+        if cached_query is None:
+            return None
 
-        return list(result)
+        expiry_time, documents = cached_query
+        if expiry_time > time.monotonic():
+            return documents
+        self.__query_cache.pop(query_key, None)
+        return None
 
-    def _fill_data_set_lookup_set(self, data_set_record: DataSet, result: Set[ObjectId]) -> None:
-        if data_set_record is None:
-            return
+    def _get_query_cache_generation(self) -> int:
+        """Returns the number of writes to this data source that cleared cached query results."""
+        return self.__query_cache_generation
 
+    def _cache_query(self, query_key: str, documents: List[Dict[str, Any]], generation: int) -> None:
+        """Caches documents returned by the query pipeline for query_cache_ttl seconds,
+        unless there was a write to this data source after the query started
+        at the specified generation.
+        """
+        if self.query_cache_ttl is not None and generation == self.__query_cache_generation:
+            self.__query_cache[query_key] = (time.monotonic() + self.query_cache_ttl, documents)
+
+    def __clear_query_cache(self) -> None:
+        """Clears cached query results, called on each write to this data source."""
+        # Queries running during the write do not cache their results
+        self.__query_cache_generation += 1
+        if self.__query_cache:
+            self.__query_cache.clear()
+
+    def _get_data_set_filter(self, load_from: ObjectId) -> Dict[str, Any]:
+        """Returns a new filter on dataset lookup list and cutoff_time, shared by
+        queries and load by key. Datasets are matched with a flat $in over their
+        ObjectIds so that the filter can use an index on _dataset.
+        """
+        data_set_filter = {'_dataset': {'$in': self.get_data_set_lookup_list(load_from)}}
+
+        cutoff_time = self.get_cutoff_time(load_from)
+        if cutoff_time is not None:
+            data_set_filter['_id'] = {'$lte': cutoff_time}
+
+        return data_set_filter
+
+    def _build_data_set_lookup_list(self, data_set_record: DataSet) -> Tuple[ObjectId, ...]:
+        """Returns the dataset itself and its imports, where each import
+        is expanded using its own cached lookup list.
+
+        Lookup lists of imports that are not cached yet are built and cached
+        first. Imports are walked depth first using a stack rather than
+        recursion, so that deep import chains do not reach the recursion limit.
+        """
+        if data_set_record is None:
+            return ()
+
+        import_dict = self.__import_dict
+
+        # Datasets that are imported but not cached are loaded one level
+        # of the import graph at a time, with one query for each level
+        data_set_dict = {data_set_record.id_.binary: data_set_record}
+        level = [data_set_record]
+        while level:
+            level_ids = []
+            for record in level:
+                for import_id in record.imports or ():
+                    import_key = import_id.binary
+                    if DataSource._is_root(import_id) or import_key in import_dict or \
+                            import_key in data_set_dict:
+                        continue
+                    # Placeholder until the level is loaded, so the same import is loaded once
+                    data_set_dict[import_key] = None
+                    level_ids.append(import_id)
+            if not level_ids:
+                break
+            level = self.__load_imported_data_sets(level_ids)
+            for record in level:
+                data_set_dict[record.id_.binary] = record
+
+        stack = [(data_set_record, iter(data_set_record.imports or ()))]
+        stack_keys = {data_set_record.id_.binary}
+        while True:
+            record, imports = stack[-1]
+            for import_id in imports:
+                import_key = import_id.binary
+                if DataSource._is_root(import_id) or import_key in import_dict or import_key in stack_keys:
+                    continue
+                # Lookup list of the import is built before the lookup list of the dataset that imports it
+                import_record = data_set_dict[import_key]
+                stack_keys.add(import_key)
+                stack.append((import_record, iter(import_record.imports or ())))
+                break
+            else:
+                stack.pop()
+                lookup_list = self.__merge_data_set_lookup_list(record)
+                if not stack:
+                    return lookup_list
+                import_dict[record.id_.binary] = lookup_list
+
+    def __merge_data_set_lookup_list(self, data_set_record: DataSet) -> Tuple[ObjectId, ...]:
+        """Returns the dataset itself and its imports, merged with the lookup lists of the imports."""
         if not ObjectId.is_valid(data_set_record.id_):
             raise Exception('Required ObjectId value is not set.')
         if data_set_record.key == '':
@@ -401,20 +591,29 @@ class TemporalMongoDataSource(MongoDataSource):
         cutoff_time = self.get_cutoff_time(data_set_record.data_set)
 
         if cutoff_time is not None and data_set_record.id_ >= cutoff_time:
-            return
+            return ()
 
-        result.add(data_set_record.id_)
+        # Duplicates are removed using raw bytes of the ObjectIds
+        data_set_record_key = data_set_record.id_.binary
+        result = [data_set_record.id_]
+        result_keys = {data_set_record_key}
 
         if data_set_record.imports is not None:
             for data_set_id in data_set_record.imports:
-                if data_set_record.id_ == data_set_id:
+                data_set_key = data_set_id.binary
+                if data_set_key == data_set_record_key:
                     raise Exception(f'Dataset {data_set_record.key} with ObjectId={data_set_record.id_} '
                                     f'includes itself in the list of its imports.')
-                if data_set_id not in result:
-                    result.add(data_set_id)
-                    cached_import_list = self.get_data_set_lookup_list(data_set_id)
-                    for import_id in cached_import_list:
-                        result.add(import_id)
+                if data_set_key not in result_keys:
+                    result_keys.add(data_set_key)
+                    result.append(data_set_id)
+                    for import_id in self.get_data_set_lookup_list(data_set_id):
+                        import_key = import_id.binary
+                        if import_key not in result_keys:
+                            result_keys.add(import_key)
+                            result.append(import_id)
+
+        return tuple(result)
 
     def _check_not_readonly(self, data_set_id: ObjectId):
         if self.readonly:
@@ -1,21 +1,23 @@
 from __future__ import annotations
 
-from enum import Enum
-from typing import Iterable, Dict, Any, List, TypeVar
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Dict, Any, List, Optional, Tuple, TypeVar
 from bson import ObjectId
 from pymongo.collection import Collection
 from pymongo.command_cursor import CommandCursor
-import datetime as dt
-import numpy as np
 
 import datacentric.extensions.str as str_ext
-from datacentric.types.time import date_ext
-from datacentric.types.time.local_minute import LocalMinute
 from datacentric.types.record import Record
-from datacentric.platform.serialization.serializer import deserialize
+from datacentric.platform.serialization.serializer import deserialize, serialize_predicate_element
 
 TRecord = TypeVar('TRecord', bound=Record)
 
+DEFAULT_BATCH_SIZE = 1000
+"""Default number of distinct keys processed per batch by as_iterable."""
+
+QUERY_CACHE_MAX_DOCUMENTS = 10_000
+"""Maximum number of documents returned by a query for its result to be cached."""
+
 
 class TemporalMongoQuery:
     """Implements query methods for temporal MongoDB data source.
@@ -24,19 +26,32 @@ class TemporalMongoQuery:
     of the record across multiple datasets.
     """
     def __init__(self, record_type: type, data_source: 'TemporalMongoDataSource', collection: Collection,
-                 load_from: ObjectId):
+                 load_from: ObjectId, batch_size: int = DEFAULT_BATCH_SIZE):
         from datacentric.platform.storage import TemporalMongoDataSource
         self._data_source: TemporalMongoDataSource = data_source
         self._type = record_type
         self._collection = collection
         self._load_from = load_from
-        self._pipeline: List[Dict[str, Dict[Any]]] = [{'$match': {'_t': self._type.__name__}}]
+        self._batch_size = batch_size
+        self._type_name = record_type.__name__
+        self._pipeline: List[Dict[str, Dict[Any]]] = [{'$match': {'_t': self._type_name}}]
+
+    def _clone(self, pipeline: List[Dict[str, Dict[Any]]]) -> TemporalMongoQuery:
+        """Returns a query with the same parameters as this one and the specified pipeline,
+        bypassing __init__ to avoid building the initial pipeline.
+        """
+        query = TemporalMongoQuery.__new__(TemporalMongoQuery)
+        query._data_source = self._data_source
+        query._type = self._type
+        query._collection = self._collection
+        query._load_from = self._load_from
+        query._batch_size = self._batch_size
+        query._type_name = self._type_name
+        query._pipeline = pipeline
+        return query
 
     def __has_sort(self) -> bool:
-        stage_names = [stage_name
-                       for stage in self._pipeline
-                       for stage_name in stage.keys()]
-        return '$sort' in stage_names
+        return any('$sort' in stage for stage in self._pipeline)
 
     def where(self, predicate: Dict[str, Any]) -> TemporalMongoQuery:
         """Filters a sequence of values based on passed dictionary parameter.
@@ -50,10 +65,7 @@ class TemporalMongoQuery:
 
             TemporalMongoQuery.__fix_predicate_query(renamed_keys)
 
-            query = TemporalMongoQuery(self._type, self._data_source, self._collection, self._load_from)
-            query._pipeline = self._pipeline.copy()
-            query._pipeline.append({'$match': renamed_keys})
-            return query
+            return self._clone(self._pipeline + [{'$match': renamed_keys}])
         else:
             raise Exception(f'All where(...) clauses of the query must precede'
                             f'sort_by(...) or sort_by_descending(...) clauses of the same query.')
@@ -67,7 +79,7 @@ class TemporalMongoQuery:
             elif type(value) is list:
                 updated_value = TemporalMongoQuery.__process_list(value)
             else:
-                updated_value = TemporalMongoQuery.__process_element(value)
+                updated_value = serialize_predicate_element(value)
             dict_[k] = updated_value
 
     @staticmethod
@@ -79,7 +91,7 @@ class TemporalMongoQuery:
             elif type(value) is list:
                 updated_value = TemporalMongoQuery.__process_list(value)
             else:
-                updated_value = TemporalMongoQuery.__process_element(value)
+                updated_value = serialize_predicate_element(value)
 
             dict_[k] = updated_value
         return dict_
@@ -94,134 +106,171 @@ class TemporalMongoQuery:
             elif type(value) is list:
                 updated_value = TemporalMongoQuery.__process_list(value)
             else:
-                updated_value = TemporalMongoQuery.__process_element(value)
+                updated_value = serialize_predicate_element(value)
             updated_list.append(updated_value)
         return updated_list
 
-    @staticmethod
-    def __process_element(value) -> Any:
-        """Serializes elements to bson valid objects."""
-        value_type = type(value)
-        if value_type == LocalMinute:
-            return date_ext.minute_to_iso_int(value)
-        elif value_type == dt.date:
-            return date_ext.date_to_iso_int(value)
-        elif value_type == dt.time:
-            return date_ext.time_to_iso_int(value)
-        elif value_type == dt.datetime:
-            return value
-        elif value_type == np.ndarray:
-            return value.tolist()
-        elif issubclass(value_type, Enum):
-            return value.name
-        else:
-            return value
-
     def sort_by(self, attr: str) -> TemporalMongoQuery:
         """Sorts the elements of a sequence in ascending order according to provided attribute name."""
-        # Adding sort argument since sort stage is already present.
-        if self.__has_sort():
-            query = TemporalMongoQuery(self._type, self._data_source, self._collection, self._load_from)
-            query._pipeline = self._pipeline.copy()
-            sorts = next(stage['$sort'] for stage in query._pipeline
-                         if '$sort' in stage)
-            sorts[str_ext.to_pascal_case(attr)] = 1
-            return query
-        # append sort stage
-        else:
-            query = TemporalMongoQuery(self._type, self._data_source, self._collection, self._load_from)
-            query._pipeline = self._pipeline.copy()
-            query._pipeline.append({'$sort': {str_ext.to_pascal_case(attr): 1}})
-            return query
+        return self.__add_sort(attr, 1)
 
     def sort_by_descending(self, attr) -> TemporalMongoQuery:
         """Sorts the elements of a sequence in descending order according to provided attribute name."""
+        return self.__add_sort(attr, -1)
+
+    def __add_sort(self, attr: str, direction: int) -> TemporalMongoQuery:
+        """Returns a query sorted by the provided attribute name in the specified direction."""
+        sort_key = str_ext.to_pascal_case(attr)
         # Adding sort argument since sort stage is already present.
         if self.__has_sort():
-            query = TemporalMongoQuery(self._type, self._data_source, self._collection, self._load_from)
-            query._pipeline = self._pipeline.copy()
-            sorts = next(stage['$sort'] for stage in query._pipeline
-                         if '$sort' in stage)
-            sorts[str_ext.to_pascal_case(attr)] = -1
-            return query
+            # Replace the sort stage rather than updating it in place, it is shared with this query
+            return self._clone([{'$sort': {**stage['$sort'], sort_key: direction}}
+                                if '$sort' in stage else stage
+                                for stage in self._pipeline])
         # append sort stage
         else:
-            query = TemporalMongoQuery(self._type, self._data_source, self._collection, self._load_from)
-            query._pipeline = self._pipeline.copy()
-            query._pipeline.append({'$sort': {str_ext.to_pascal_case(attr): -1}})
-            return query
+            return self._clone(self._pipeline + [{'$sort': {sort_key: direction}}])
 
     def as_iterable(self) -> Iterable[TRecord]:
         """Applies aggregation on collection and returns its result as Iterable."""
+        # Stages are added to a copy so that the query can be iterated more than once
+        batch_queryable = self._pipeline.copy()
         if not self.__has_sort():
-            batch_queryable = self._data_source.apply_final_constraints(self._pipeline, self._load_from)
-        else:
-            batch_queryable = self._pipeline
+            batch_queryable = self._data_source.apply_final_constraints(batch_queryable, self._load_from)
 
         projected_batch_queryable = batch_queryable
         projected_batch_queryable.append({'$project': {'Id': '$_id', 'Key': '$_key', '_id': 0}})
 
-        with self._collection.aggregate(projected_batch_queryable) as cursor:  # type: CommandCursor
-            batch_size = 1000
-            continue_query = True
-
-            while continue_query:
-                batch_index = 0
-                batch_keys_hash_set = set()
-                batch_ids_hash_set = set()
-                batch_ids_list = []
-
-                while True:
-                    continue_query = cursor.alive
-                    if continue_query:
-                        record_info = cursor.next()
-                        batch_key = record_info['Key']
-                        batch_id = record_info['Id']
-                        if batch_key not in batch_keys_hash_set:
-                            batch_keys_hash_set.add(batch_key)
-                            batch_index += 1
-                        batch_ids_hash_set.add(batch_id)
-                        batch_ids_list.append(batch_id)
-                        if batch_index == batch_size:
-                            break
-                    else:
-                        break
-                if not continue_query and batch_index == 0:
-                    break
+        # Dataset constraints for version resolution do not change between
+        # batches and are built once per query
+        version_constraints = self._data_source.apply_final_constraints([], self._load_from)
+
+        # Records in imported datasets are only visible before imports cutoff time
+        imports_cutoff = self._data_source.get_imports_cutoff_time(self._load_from)
+        if imports_cutoff is not None:
+            version_constraints.append({'$match': {'$or': [{'_dataset': self._load_from},
+                                                           {'_id': {'$lt': imports_cutoff}}]}})
+
+        # Documents are cached by the pipelines, which include dataset lookup list and cutoff time
+        query_documents: Optional[List[Dict[str, Any]]] = None
+        if self._data_source.query_cache_ttl is not None:
+            query_key = repr((projected_batch_queryable, version_constraints))
+            cached_documents = self._data_source._get_cached_query(query_key)
+            if cached_documents is not None:
+                yield from map(deserialize, cached_documents)
+                return
+            query_cache_generation = self._data_source._get_query_cache_generation()
+            query_documents = []
+
+        # Cursor batch size is aligned with the number of keys processed per batch
+        with self._collection.aggregate(projected_batch_queryable, batchSize=self._batch_size) as cursor:
+            batches = self.__read_batches(cursor)
 
-                id_queryable = [{'$match': {'_key': {'$in': list(batch_keys_hash_set)}}}]
-                id_queryable = self._data_source.apply_final_constraints(id_queryable, self._load_from)
-                id_queryable.append({'$sort': {'_key': 1, '_dataset': -1, '_id': -1}})
-
-                projected_id_queryable = id_queryable
-                projected_id_queryable.append(
-                    {'$project': {'Id': '$_id', 'DataSet': '$_dataset', 'Key': '$_key', '_id': 0}})
-
-                imports_cutoff = self._data_source.get_imports_cutoff_time(self._load_from)
-
-                record_ids = []
-                current_key = None
-                for obj in self._collection.aggregate(projected_id_queryable):
-                    obj_key = obj['Key']
-                    if current_key == obj_key:
-                        pass
-                    else:
-                        record_id = obj['Id']
-                        record_data_set = obj['DataSet']
-                        if imports_cutoff is None or record_data_set == self._load_from or record_id < imports_cutoff:
-                            current_key = obj_key
-                            if record_id in batch_ids_hash_set:
-                                record_ids.append(record_id)
-
-                if len(record_ids) == 0:
+            # Records of the first batch are fetched in this thread, the executor
+            # is only created when there is a second batch to fetch in the background
+            batch = next(batches, None)
+            if batch is not None:
+                records = self.__fetch_records(*batch, version_constraints)
+                batch = next(batches, None)
+                if batch is None:
+                    yield from self.__deserialize_batch(records, query_documents)
+                else:
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        # Records of each batch are fetched in the background while
+                        # the records of the previous batch are deserialized
+                        records_future: Future = executor.submit(self.__fetch_records, *batch, version_constraints)
+                        yield from self.__deserialize_batch(records, query_documents)
+
+                        for batch_keys, batch_ids in batches:
+                            next_records_future = executor.submit(self.__fetch_records, batch_keys, batch_ids,
+                                                                  version_constraints)
+                            yield from self.__deserialize_batch(records_future.result(), query_documents)
+                            records_future = next_records_future
+
+                        yield from self.__deserialize_batch(records_future.result(), query_documents)
+
+        if query_documents is not None and len(query_documents) <= QUERY_CACHE_MAX_DOCUMENTS:
+            self._data_source._cache_query(query_key, query_documents, query_cache_generation)
+
+    @staticmethod
+    def __deserialize_batch(documents: List[Dict[str, Any]],
+                            query_documents: Optional[List[Dict[str, Any]]]) -> Iterator[TRecord]:
+        """Deserializes documents of the batch, adding them to query documents if they are cached.
+        Documents are not added once there are too many of them to be cached.
+        """
+        if query_documents is not None and len(query_documents) <= QUERY_CACHE_MAX_DOCUMENTS:
+            query_documents.extend(documents)
+        return map(deserialize, documents)
+
+    def __read_batches(self, cursor: CommandCursor) -> Iterator[Tuple[List[Any], List[ObjectId]]]:
+        """Splits the key scan cursor into batches of distinct keys, yielding
+        the keys in each batch and the ids of all matching documents in
+        the order of the query.
+        """
+        batch_size = self._batch_size
+        continue_query = True
+        while continue_query:
+            batch_index = 0
+            batch_keys_hash_set = set()
+            batch_keys_list = []
+            batch_ids_list = []
+
+            # Bound methods are looked up once per batch, ids are unique
+            # so they do not need a hash set
+            add_batch_key = batch_keys_hash_set.add
+            append_batch_key = batch_keys_list.append
+            append_batch_id = batch_ids_list.append
+
+            # The cursor is consumed across batches, else branch
+            # is only reached when the cursor is exhausted
+            for record_info in cursor:
+                batch_key = record_info['Key']
+                if batch_key not in batch_keys_hash_set:
+                    add_batch_key(batch_key)
+                    append_batch_key(batch_key)
+                    batch_index += 1
+                append_batch_id(record_info['Id'])
+                if batch_index == batch_size:
                     break
+            else:
+                continue_query = False
+
+            if batch_index > 0:
+                yield batch_keys_list, batch_ids_list
+
+    def __get_records_pipeline(self, batch_keys: List[Any], batch_ids: List[ObjectId],
+                               version_constraints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Returns pipeline that resolves the latest version of each key in the batch
+        and fetches the records where that version is one of the batch ids.
+        """
+        return [
+            {'$match': {'_key': {'$in': batch_keys}}},
+            *version_constraints,
+
+            # Resolve the latest version of each key on the server, so that
+            # only one document per key is returned
+            {'$sort': {'_key': 1, '_dataset': -1, '_id': -1}},
+            {'$group': {'_id': '$_key', 'Id': {'$first': '$_id'}}},
 
-                record_queryable = [{'$match': {'_id': {'$in': record_ids}}}]
-                record_dict = dict()
-                for record in self._collection.aggregate(record_queryable):
-                    rec = deserialize(record)
-                    record_dict[rec.id_] = rec
+            # Keep only the latest versions that match the query and fetch
+            # their records in the same aggregate
+            {'$match': {'Id': {'$in': batch_ids}}},
+            {'$lookup': {'from': self._collection.name, 'localField': 'Id',
+                         'foreignField': '_id', 'as': 'Record'}},
+            {'$unwind': '$Record'},
+            {'$replaceRoot': {'newRoot': '$Record'}}
+        ]
+
+    def __fetch_records(self, batch_keys: List[Any], batch_ids: List[ObjectId],
+                        version_constraints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetches the records of the batch in the order of the batch ids,
+        which follows the order of the query.
+        """
+        pipeline = self.__get_records_pipeline(batch_keys, batch_ids, version_constraints)
+        records = list(self._collection.aggregate(pipeline, batchSize=self._batch_size))
 
-                for batch_id in batch_ids_list:
-                    if batch_id in record_dict:
-                        yield record_dict[batch_id]
+        # Order is restored here rather than on the server, where looking up
+        # the position of each record in the batch ids is a linear scan
+        batch_positions = {id_: position for position, id_ in enumerate(batch_ids)}
+        records.sort(key=lambda record: batch_positions[record['_id']])
+        return records
@@ -1,10 +1,17 @@
 from abc import ABC
 
+from datacentric.platform.reflection.class_info import ClassInfo
+
 
 class Data(ABC):
     """ Abstract base class for data structures
     """
-    __slots__ = []
+    __slots__ = ()
 
     def __init__(self):
         pass
+
+    def __init_subclass__(cls, **kwargs):
+        """Registers the class in ClassInfo when it is created."""
+        super().__init_subclass__(**kwargs)
+        ClassInfo.register_type(cls)
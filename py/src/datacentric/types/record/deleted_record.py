@@ -5,7 +5,7 @@ class DeletedRecord(Record):
     """When returned by the data source, this record has the same
     effect as if no record was found. It is used to indicate
     a deleted record when audit log must be preserved."""
-    __slots__ = []
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
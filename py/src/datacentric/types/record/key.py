@@ -14,7 +14,7 @@ class Key(Data, ABC):
     type specific become key tokens. Property value and str(self)
     consists of key tokens with semicolon delimiter.
     """
-    __slots__ = []
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
@@ -44,7 +44,7 @@ class Key(Data, ABC):
     def get_key_token(obj: object, slot: str) -> str:
         """Convert key element to string key token.
         """
-        attr_value = obj.__getattribute__(slot)
+        attr_value = getattr(obj, slot)
         attr_type = type(attr_value)
         if attr_value is None:
             raise ValueError(f'Key element {slot} of type {type(obj).__name__} is null. '
@@ -142,7 +142,7 @@ class Key(Data, ABC):
             if issubclass(member_type, Key):
                 key_element = member_type()
                 token_index = key_element.__populate_from_string(tokens, token_index)
-                self.__setattr__(slot, key_element)
+                setattr(self, slot, key_element)
                 continue
 
             # Check that token is not empty
@@ -171,7 +171,7 @@ class Key(Data, ABC):
             else:
                 raise Exception(f'Unexpected type {member_type.__name__} in key tokens.')
 
-            self.__setattr__(slot, value)
+            setattr(self, slot, value)
             token_index += 1
 
         return token_index
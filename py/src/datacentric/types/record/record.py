@@ -8,7 +8,7 @@ from datacentric.types.record import Data
 class Record(Data, ABC):
     """Base class of records stored in data source.
     """
-    __slots__ = ['context', 'id_', 'data_set', '_key']
+    __slots__ = ('context', 'id_', 'data_set', '_key')
 
     context: Context
     id_: ObjectId
@@ -12,7 +12,7 @@ class RootRecord(TypedRecord[TKey], ABC):
     """Base class of records stored in root dataset of the data store.
     This class overrides DataSet property to always return ObjectId('000000000000000000000000').
     """
-    __slots__ = []
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
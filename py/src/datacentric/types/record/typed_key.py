@@ -13,6 +13,7 @@ class TypedKey(Generic[TRecord], Key, ABC):
     Any elements of defined in the class derived from this one
     become key tokens.
     """
+    __slots__ = ()
 
     def __init__(self):
         super().__init__()
@@ -29,5 +30,5 @@ class TypedKey(Generic[TRecord], Key, ABC):
             raise Exception(f'Root data type {root_type_name} has fewer elements than key type {type(self).__name__}.')
 
         for key_element in key_elements:
-            value = record.__getattribute__(key_element)
-            self.__setattr__(key_element, value)
+            value = getattr(record, key_element)
+            setattr(self, key_element, value)
@@ -9,7 +9,7 @@ TKey = TypeVar('TKey')
 
 class TypedRecord(Generic[TKey], Record, ABC):
     """Base class of records stored in data source."""
-    __slots__ = []
+    __slots__ = ()
 
     def __init__(self):
         Record.__init__(self)
@@ -22,48 +22,31 @@ def minute_to_iso_int(value: LocalMinute) -> int:
 
 
 def iso_int_to_date(value: int) -> dt.date:
-    year = value // 100_00
-    value -= year * 100_00
-    month = value // 100
-    value -= month * 100
-    day = value
+    year, value = divmod(value, 100_00)
+    month, day = divmod(value, 100)
     return dt.date(year, month, day)
 
 
 def iso_int_to_date_time(value: int) -> dt.datetime:
-    iso_date = value // 100_00_00_000
-    iso_time = value - 100_00_00_000 * iso_date
-
-    year = iso_date // 100_00
-    iso_date -= year * 100_00
-    month = iso_date // 100
-    iso_date -= month * 100
-    day = iso_date
-
-    hour = iso_time // 100_00_000
-    iso_time -= hour * 100_00_000
-    minute = iso_time // 100_000
-    iso_time -= minute * 100_000
-    second = iso_time // 1000
-    iso_time -= second * 1000
-    millisecond = iso_time
+    iso_date, iso_time = divmod(value, 100_00_00_000)
+
+    year, iso_date = divmod(iso_date, 100_00)
+    month, day = divmod(iso_date, 100)
+
+    hour, iso_time = divmod(iso_time, 100_00_000)
+    minute, iso_time = divmod(iso_time, 100_000)
+    second, millisecond = divmod(iso_time, 1000)
 
     return dt.datetime(year, month, day, hour, minute, second, millisecond * 1000)
 
 
 def iso_int_to_local_minute(value: int) -> LocalMinute:
-    hour = value // 100
-    value -= hour * 100
-    minute = value
+    hour, minute = divmod(value, 100)
     return LocalMinute(hour, minute)
 
 
 def iso_int_to_time(value: int) -> dt.time:
-    hour = value // 100_00_000
-    value -= hour * 100_00_000
-    minute = value // 100_000
-    value -= minute * 100_000
-    second = value // 1000
-    value -= second * 1000
-    millisecond = value
+    hour, value = divmod(value, 100_00_000)
+    minute, value = divmod(value, 100_000)
+    second, millisecond = divmod(value, 1000)
     return dt.time(hour, minute, second, millisecond * 1000)
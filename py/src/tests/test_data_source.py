@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+
+from bson import ObjectId
+
+from datacentric.platform.serialization.serializer import serialize, deserialize
+from datacentric.platform.storage import TemporalMongoDataSource
+from tests.data_sample import BaseSample, DerivedSample
+
+
+class TestDataSourceBatch(unittest.TestCase):
+    def setUp(self):
+        # save_many of the data source records its calls instead of saving
+        self.saved = []
+        self.fail_type = None
+        save_many_patcher = mock.patch.object(TemporalMongoDataSource, 'save_many',
+                                              autospec=True, side_effect=self.record_save_many)
+        save_many_patcher.start()
+        self.addCleanup(save_many_patcher.stop)
+
+        self.source = TemporalMongoDataSource()
+        self.data_set = ObjectId()
+
+    def record_save_many(self, source, record_type, records, save_to):
+        """Records save_many call, fails for records of the type in fail_type."""
+        if record_type is self.fail_type:
+            raise Exception(f'Cannot save {record_type.__name__}.')
+        records = list(records)
+        for record in records:
+            record.id_ = ObjectId()
+            record.data_set = save_to
+        self.saved.append((record_type, save_to, records))
+
+    def test_flush_on_exit(self):
+        records = [BaseSample(), BaseSample(), DerivedSample()]
+
+        with self.source.batch():
+            for record in records:
+                self.source.save_one(type(record), record, self.data_set)
+            self.assertEqual(self.saved, [])
+            self.assertTrue(all(record.id_ is None for record in records))
+
+        self.assertEqual(self.saved, [(BaseSample, self.data_set, records[:2]),
+                                      (DerivedSample, self.data_set, records[2:])])
+        self.assertTrue(all(record.id_ is not None for record in records))
+
+        # Records are saved immediately after the batch
+        record = BaseSample()
+        self.source.save_one(BaseSample, record, self.data_set)
+        self.assertIsNotNone(record.id_)
+
+    def test_nested_batch(self):
+        outer_record = BaseSample()
+        inner_record = BaseSample()
+
+        with self.source.batch():
+            self.source.save_one(BaseSample, outer_record, self.data_set)
+            with self.source.batch():
+                self.source.save_one(BaseSample, inner_record, self.data_set)
+            # Nested batch joins the enclosing one and does not save on exit
+            self.assertEqual(self.saved, [])
+
+        self.assertEqual(self.saved, [(BaseSample, self.data_set, [outer_record, inner_record])])
+
+    def test_failing_save(self):
+        self.fail_type = BaseSample
+        derived_record = DerivedSample()
+
+        with self.assertRaises(Exception):
+            with self.source.batch():
+                self.source.save_one(BaseSample, BaseSample(), self.data_set)
+                self.source.save_one(DerivedSample, derived_record, self.data_set)
+
+        # Data source leaves batch mode when records cannot be saved
+        record = DerivedSample()
+        self.source.save_one(DerivedSample, record, self.data_set)
+        self.assertIsNotNone(record.id_)
+
+        # Nested batch is not assumed for the next batch, records are saved on exit
+        with self.source.batch():
+            record = DerivedSample()
+            self.source.save_one(DerivedSample, record, self.data_set)
+        self.assertIsNotNone(record.id_)
+
+    def test_failing_flush_keeps_pending(self):
+        base_record = BaseSample()
+        derived_records = [DerivedSample(), DerivedSample()]
+
+        with self.source.batch():
+            self.source.save_one(BaseSample, base_record, self.data_set)
+            self.source.save_one(DerivedSample, derived_records[0], self.data_set)
+            self.fail_type = DerivedSample
+            with self.assertRaises(Exception):
+                self.source.flush()
+
+            # Group that failed remains pending, groups saved before it do not
+            self.assertEqual(self.saved, [(BaseSample, self.data_set, [base_record])])
+            self.source.save_one(DerivedSample, derived_records[1], self.data_set)
+            self.fail_type = None
+
+        self.assertEqual(self.saved[1:], [(DerivedSample, self.data_set, derived_records)])
+
+
+class TestDataSourceSerialization(unittest.TestCase):
+    def test_private_state_not_serialized(self):
+        source = TemporalMongoDataSource()
+        source.data_source_name = 'Sample'
+        source.id_ = ObjectId()
+        source._common_id_cache = ObjectId()
+
+        dict_ = serialize(source)
+        self.assertEqual(dict_['DataSourceName'], 'Sample')
+        self.assertNotIn('CommonIdCache', dict_)
+        self.assertIsNone(deserialize(dict_)._common_id_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from datacentric.extensions.lru_dict import LruDict
+
+
+class TestLruDict(unittest.TestCase):
+    def test_eviction(self):
+        d = LruDict(2)
+        d['a'] = 1
+        d['b'] = 2
+        d['c'] = 3
+        self.assertEqual(len(d), 2)
+        self.assertNotIn('a', d)
+        self.assertEqual(d['b'], 2)
+        self.assertEqual(d['c'], 3)
+
+    def test_recently_used(self):
+        d = LruDict(2)
+        d['a'] = 1
+        d['b'] = 2
+        self.assertEqual(d.get('a'), 1)
+        d['c'] = 3
+        self.assertIn('a', d)
+        self.assertNotIn('b', d)
+
+        self.assertEqual(d['a'], 1)
+        d['d'] = 4
+        self.assertIn('a', d)
+        self.assertNotIn('c', d)
+
+        d['a'] = 5
+        d['e'] = 6
+        self.assertEqual(d['a'], 5)
+        self.assertNotIn('d', d)
+        self.assertIsNone(d.get('b'))
+        self.assertEqual(d.get('b', 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
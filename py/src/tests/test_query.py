@@ -1,8 +1,12 @@
 import unittest
 import datetime as dt
+from unittest import mock
 
+from datacentric.platform.context import Context
+from datacentric.platform.serialization.serializer import serialize
+from datacentric.platform.storage import temporal_mongo_data_source, temporal_mongo_query
 from datacentric.types.time import LocalMinute
-from tests.data_sample import NullableElementsSample, SampleEnum
+from tests.data_sample import BaseSample, NullableElementsSample, SampleEnum
 from tests.temporal_test_context import TemporalTestContext
 
 
@@ -58,6 +62,70 @@ class TestQuery(unittest.TestCase):
             expected_constrained = ('A1;false;1;20030502;101531000;1001;20030502101500000;EnumValue2', 5)
             self.assertTrue(expected_constrained in constrained_results)
 
+    def test_query_cache(self):
+        # Clock read by the query cache is patched, so that cached results expire without waiting
+        with TemporalTestContext(self) as context, \
+                mock.patch.object(temporal_mongo_data_source, 'time') as cache_time:
+            cache_time.monotonic.return_value = 0.0
+            context.data_source.query_cache_ttl = 60.0
+            save_sample(context, 0)
+
+            def query_indices():
+                query = context.data_source.get_query(BaseSample, context.data_set).sort_by('record_index')
+                return [obj.record_index for obj in query.as_iterable()]
+
+            self.assertEqual(query_indices(), [0])
+
+            # Record inserted bypassing the data source is not seen while the cached result is not expired
+            insert_sample(context, 1)
+            self.assertEqual(query_indices(), [0])
+
+            # Cached result is not used after a write to the data source
+            save_sample(context, 2)
+            self.assertEqual(query_indices(), [0, 1, 2])
+
+            # Cached result is not used after it expires
+            insert_sample(context, 3)
+            cache_time.monotonic.return_value = 59.0
+            self.assertEqual(query_indices(), [0, 1, 2])
+            cache_time.monotonic.return_value = 60.0
+            self.assertEqual(query_indices(), [0, 1, 2, 3])
+
+            # Cached result is not used after the database is dropped
+            insert_sample(context, 4)
+            self.assertEqual(query_indices(), [0, 1, 2, 3])
+            context.data_source.delete_db()
+            self.assertEqual(query_indices(), [])
+
+            # Results with too many documents are not cached
+            with mock.patch.object(temporal_mongo_query, 'QUERY_CACHE_MAX_DOCUMENTS', 1):
+                save_sample(context, 5)
+                save_sample(context, 6)
+                self.assertEqual(query_indices(), [5, 6])
+                insert_sample(context, 7)
+                self.assertEqual(query_indices(), [5, 6, 7])
+
+
+def create_sample(record_index: int) -> BaseSample:
+    record = BaseSample()
+    record.record_id = 'A'
+    record.record_index = record_index
+    record.double_element = 1.0
+    return record
+
+
+def save_sample(context: Context, record_index: int) -> None:
+    context.data_source.save_one(BaseSample, create_sample(record_index), context.data_set)
+
+
+def insert_sample(context: Context, record_index: int) -> None:
+    """Inserts the record directly into its collection, without clearing cached query results."""
+    record = create_sample(record_index)
+    record.id_ = context.data_source.create_ordered_object_id()
+    record.data_set = context.data_set
+    collection = context.data_source.db.get_collection(BaseSample.__name__)
+    collection.insert_one(serialize(record))
+
 
 if __name__ == "__main__":
     unittest.main()
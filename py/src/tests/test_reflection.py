@@ -1,7 +1,7 @@
 import unittest
 
 from datacentric.platform.reflection import ClassInfo
-from datacentric.types.record import TypedRecord, TypedKey, Data
+from datacentric.types.record import TypedRecord, TypedKey, RootRecord, Data
 
 
 class BaseKey(TypedKey['BaseRecord']):
@@ -20,6 +20,14 @@ class ElementData(Data):
     pass
 
 
+class RootSampleKey(TypedKey['RootSample']):
+    pass
+
+
+class RootSample(RootRecord[RootSampleKey]):
+    pass
+
+
 class TestClassInfo(unittest.TestCase):
     def test_root_type(self):
         with self.assertRaises(Exception):
@@ -30,6 +38,8 @@ class TestClassInfo(unittest.TestCase):
         self.assertTrue(ClassInfo.get_root_type(BaseRecord) == BaseRecord)
         self.assertTrue(ClassInfo.get_root_type(DerivedRecord) == BaseRecord)
         self.assertTrue(ClassInfo.get_root_type(ElementData) == ElementData)
+        # Types derived from RootRecord are stored in RootRecord collection
+        self.assertTrue(ClassInfo.get_root_type(RootSample) == RootRecord)
 
     def test_key_type(self):
         self.assertEqual(ClassInfo.get_key_from_record(BaseRecord), BaseKey)
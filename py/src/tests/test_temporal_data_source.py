@@ -1,9 +1,12 @@
+import itertools
+import os
 import unittest
+from unittest import mock
 
 from bson import ObjectId
 
 from datacentric.platform.context import Context
-from datacentric.platform.storage import DataSet
+from datacentric.platform.storage import DataSet, TemporalMongoDataSource, mongo_data_source
 from tests.data_sample import *
 from tests.temporal_test_context import TemporalTestContext
 
@@ -191,6 +194,17 @@ class TestTemporalDataSource(unittest.TestCase):
             self.assertEqual(query_result[4], ('B;9', 'DataSet2', 0))
             self.assertEqual(query_result[5], ('B;11', 'DataSet3', 0))
 
+    def test_save_data_set_version(self):
+        """Checks a new version of the dataset is found from datasets that import it after it is saved."""
+        with TemporalTestContext(self) as context:
+            data_set_a = context.data_source.create_data_set('A', context.data_set)
+            old_version = context.data_source.create_data_set('Shared', context.data_set)
+            self.assertEqual(context.data_source.get_data_set('Shared', data_set_a), old_version)
+
+            new_version = context.data_source.create_data_set('Shared', context.data_set)
+            self.assertEqual(context.data_source.get_data_set('Shared', context.data_set), new_version)
+            self.assertEqual(context.data_source.get_data_set('Shared', data_set_a), new_version)
+
     def test_create_ordered_id(self):
         """Stress tests to check ObjectIds are created in increasing order."""
         with TemporalTestContext(self) as context:
@@ -200,6 +214,24 @@ class TestTemporalDataSource(unittest.TestCase):
             # Log should not contain warnings.
             self.assertTrue(str(context.log) == '')
 
+    def test_create_ordered_id_counter_wrap(self):
+        """Checks ObjectIds are created in increasing order when the counter wraps
+        around and when the data source is used in a forked process."""
+        # Counter and process id are patched where the data source reads them
+        with mock.patch.object(mongo_data_source, 'itertools') as itertools_mock, \
+                mock.patch.object(mongo_data_source, 'os', wraps=os) as os_mock:
+            itertools_mock.count.return_value = itertools.count(0xFFFFFF - 5)
+            data_source = TemporalMongoDataSource()
+            object_ids = [data_source.create_ordered_object_id() for _ in range(10)]
+
+            # Data source created in the parent process is used after fork
+            os_mock.getpid.return_value = os.getpid() + 1
+            object_ids += [data_source.create_ordered_object_id() for _ in range(10)]
+
+        for prev_object_id, object_id in zip(object_ids, object_ids[1:]):
+            self.assertTrue(prev_object_id < object_id)
+        self.assertNotEqual(object_ids[0].binary[4:9], object_ids[-1].binary[4:9])
+
 
 if __name__ == "__main__":
     unittest.main()